@@ -0,0 +1,60 @@
+import streamlit as st
+import pandas as pd
+from diagnostics import dataframe
+from indicators import WINDOW, close_prices
+from instrumentation import instrumented
+from scanner import ALERTS, VOL_SHIFT, Z_THRESHOLD, Scanner
+
+# Longest alert table drawn; the ranking puts the strongest alerts first
+MAX_ROWS = 500
+
+def session_scanner(df: pd.DataFrame, **params) -> Scanner:
+    # The session keeps its scanner between reruns: when the panel only grew
+    # since the last run, just the new bars are scored
+    scanner = st.session_state.get("scanner")
+    if scanner is not None and scanner.params == Scanner(scanner.tickers, **params).params and scanner.matches(df):
+        scanner.update(df)
+    else:
+        scanner = st.session_state.scanner = Scanner.from_history(df, **params)
+    return scanner
+
+@instrumented
+def check_alerts(df: pd.DataFrame, tickers: list, window: int = WINDOW):
+    st.title("🚨 Alert Scanner")
+    st.subheader("Band Breaches, Volatility Regime Shifts and Return Outliers Across All Loaded Tickers")
+
+    if df.empty:
+        st.warning("No data available for the alert scanner.")
+        return
+
+    if close_prices(df).empty:
+        st.info("No valid columns found for the alert scanner.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    bars = col1.number_input("Bars to scan", min_value=1, max_value=250, value=1,
+                             help="Alerts raised on any of the most recent bars")
+    z = col2.number_input("Return outlier z-score", min_value=1.0, max_value=10.0, value=Z_THRESHOLD, step=0.5)
+    shift = col3.number_input("Volatility shift factor", min_value=1.1, max_value=5.0, value=VOL_SHIFT, step=0.1,
+                              help=f"{window}-bar over {4 * window}-bar return volatility, either way")
+    only_picked = st.checkbox("Only the tickers picked above", value=False)
+
+    # Every loaded ticker is scanned in one pass; the filter only trims the table
+    scanner = session_scanner(df, bars=int(bars), window=window, z=z, shift=shift)
+    alerts = scanner.recent
+    if only_picked:
+        alerts = alerts[alerts["Ticker"].isin([t.strip() for t in tickers])]
+
+    last_bar = scanner.last.date() if scanner.last is not None else "-"
+    st.caption(f"{len(scanner.tickers)} tickers scanned, latest bar {last_bar}")
+    for column, name in zip(st.columns(len(ALERTS)), ALERTS):
+        column.metric(name, int((alerts["Alert"] == name).sum()))
+
+    if alerts.empty:
+        st.success("Nothing is breaching.")
+        return
+
+    st.write("Alerts, strongest first (Score is how far past its threshold the value is):")
+    dataframe(alerts.head(MAX_ROWS), hide_index=True)
+    if len(alerts) > MAX_ROWS:
+        st.caption(f"Showing the top {MAX_ROWS} of {len(alerts)} alerts.")
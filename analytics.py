@@ -0,0 +1,81 @@
+import pandas as pd
+
+from decomposition import PERIOD, decompose_many, stationarity_table
+from histograms import moments
+from indicators import WINDOW, Indicators, close_prices, get_indicators
+from instrumentation import instrumented
+from pipeline import run_batch
+
+# Pure analytics core: no streamlit or plotly imports anywhere below this
+# module, so it can back both the app pages and the headless CLI in main.py.
+
+
+def select_columns(df: pd.DataFrame, cols: list) -> pd.DataFrame:
+    # Only keep specified columns that exist in the DataFrame
+    return df[[col for col in cols if col in df.columns]]
+
+
+@instrumented
+def summarize(df: pd.DataFrame) -> dict:
+    return {
+        "shape": df.shape,
+        "dtypes": df.dtypes,
+        "missing": df.isnull().sum(),
+        "describe": df.describe(),
+    }
+
+
+def bollinger_table(df: pd.DataFrame, tickers: list = None, window: int = WINDOW, k: float = 2,
+                    indicators: Indicators = None) -> pd.DataFrame:
+    # Prices with rolling mean/std, bands, daily return and volatility columns per ticker;
+    # pass precomputed indicators (e.g. one window of a WindowTensor) to skip the lookup
+    if indicators is None:
+        indicators = get_indicators(df, window=window)
+    if tickers is None:
+        tickers = indicators.close.columns.tolist()
+    upper_band = indicators.upper_band(k)
+    lower_band = indicators.lower_band(k)
+    columns = {ticker: indicators.close[ticker] for ticker in indicators.close.columns}
+    for ticker in tickers:
+        ticker = ticker.strip()
+        if ticker in indicators.close.columns:
+            columns[f'{ticker}_rolling_mean'] = indicators.rolling_mean[ticker]
+            columns[f'{ticker}_rolling_std'] = indicators.rolling_std[ticker]
+            columns[f'{ticker}_upper_band'] = upper_band[ticker]
+            columns[f'{ticker}_lower_band'] = lower_band[ticker]
+            columns[f'{ticker}_daily_return'] = indicators.daily_return[ticker]
+            columns[f'{ticker}_volatility'] = indicators.volatility[ticker]
+    return pd.DataFrame(columns, index=indicators.close.index)
+
+
+def download(tickers: list, start, end, cache_dir: str = None, interval: str = "1d") -> pd.DataFrame:
+    # Same cached, concurrent download path as the app, without any UI
+    from bars import clip_to_lookback
+    from concurrent_fetch import ConcurrentFetcher
+    from price_cache import CACHE_DIR, PriceCache, YFinanceFetcher, interval_cache_dir
+
+    cache = PriceCache(interval_cache_dir(interval, cache_dir or CACHE_DIR),
+                       fetcher=ConcurrentFetcher(YFinanceFetcher(interval)))
+    return cache.get(tickers, clip_to_lookback(start, end, interval), end)
+
+
+@instrumented
+def run_analysis(df: pd.DataFrame, tickers: list = None, window: int = WINDOW,
+                 period: int = PERIOD, max_workers: int = None) -> dict:
+    # Everything the app computes, as plain DataFrames keyed by result name
+    close = close_prices(df)
+    if tickers is None:
+        tickers = close.columns.tolist()
+    tickers = [t.strip() for t in tickers if t.strip() in close.columns]
+    indicators = get_indicators(df, window=window)
+
+    return_moments = moments(indicators.daily_return[tickers])
+    return_moments.index.name = "Ticker"
+    price_moments = moments(close[tickers])
+    price_moments.index.name = "Ticker"
+    return {
+        "summary": run_batch(df, tickers, window=window, period=period, max_workers=max_workers),
+        "return_moments": return_moments.reset_index(),
+        "price_moments": price_moments.reset_index(),
+        "stationarity": stationarity_table(decompose_many(close, tickers, period=period, max_workers=max_workers)),
+    }
@@ -1,12 +1,27 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 from download_data import download_data
+from analytics import summarize
 from filter_cols import filter_columns, create_line_chart, describe_data
-from distribution import check_distribution, distribution_for_daily_returns
-from moving_avg import plot_moving_average
-from bollinger import plot_bollinger_bands
-import os
+from indicators import WINDOW, close_prices, fingerprint
+from panel import normalize_panel, memory_bytes
+from shared_store import SharedStore, normalize_tickers, shared_store
+from snapshot import SnapshotStore
+from diagnostics import dataframe, diagnostics_controls, diagnostics_panel, session_recorder
+from instrumentation import recording, span
+from intervals import INTERVALS
+
+# The analysis pages (plotly figures, statsmodels, process pools) and the bar
+# and window-tensor engines are imported inside the sections that use them,
+# so the first page paints without them.
+# benchmarks/bench_imports.py tracks what module load costs.
+
+# Column selections, slices and the sessions' shallow copies of shared panels
+# are lazy views under copy-on-write, so they are taken without defensive
+# copies; pandas 3 always behaves this way. Set here, for the app's server
+# process only, rather than by a module the CLI and benchmarks import too.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 # Set page configuration
 st.set_page_config(
@@ -23,131 +38,315 @@ if 'filtered_df' not in st.session_state:
     st.session_state.filtered_df = pd.DataFrame()
 if 'ticker_list' not in st.session_state:
     st.session_state.ticker_list = []
+if 'summary' not in st.session_state:
+    st.session_state.summary = pd.DataFrame()
+if 'filtered_fingerprint' not in st.session_state:
+    st.session_state.filtered_fingerprint = None
+if 'analysis' not in st.session_state:
+    st.session_state.analysis = None
 
 def title():
     st.title("📈 Time Series Analysis")
     st.subheader("Please enter your Ticker Name(s)")
-    st.write("Maximum 6 tickers allowed at a time.")
+    st.write("Any number of tickers can be analysed; charts are drawn only for the tickers you pick.")
 
     # Allow multiple tickers as comma-separated input
     ticker = st.text_input("Ticker(s)", value="AAPL,NVDA", placeholder="e.g. AAPL, MSFT, GOOGL")
 
 
     if ticker:
-        ticker_list = [t.strip() for t in ticker.split(",") if t.strip()]
-        st.session_state.ticker_list = ticker_list
+        st.session_state.ticker_list = normalize_tickers(ticker.split(","))
     else:
         st.session_state.ticker_list = []
 
     with st.sidebar:
         start_date = st.date_input("Start Date", value=pd.to_datetime('2019-01-01'))
         end_date = st.date_input("End Date", value=pd.to_datetime('2024-12-31'))
+        st.selectbox("Bar size", INTERVALS, key="interval",
+                     help="Intraday bars are only available for recent dates (1m: 30 days, 1h: 2 years)")
+        st.checkbox("Store prices as float32", value=False, key="float32_prices",
+                    help="4 bytes per price instead of 8, about a third less memory for an OHLCV panel, "
+                         "at the cost of precision beyond ~7 digits")
 
     return ticker, start_date, end_date
 
+def set_filtered_df(df: pd.DataFrame):
+    # The content fingerprint is computed once here, not on every rerun
+    st.session_state.filtered_df = df
+    st.session_state.filtered_fingerprint = fingerprint(df) if not df.empty else None
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_summary(df_fingerprint: str, _df: pd.DataFrame) -> dict:
+    # Keyed on the fingerprint only; the leading underscore keeps Streamlit from hashing the frame
+    return summarize(_df)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_tickers(df_fingerprint: str, _df: pd.DataFrame) -> list:
+    return close_prices(_df).columns.tolist()
+
+@st.cache_data(max_entries=16, show_spinner="Fitting forecast models...")
+def cached_forecasts(df_fingerprint: str, tickers: tuple, _df: pd.DataFrame) -> dict:
+    # Fitted models persist on disk; this only skips reloading them on reruns
+    from forecast import forecast_many
+    return forecast_many(_df, list(tickers))
+
+@st.fragment
+def batch_summary_section():
+    # Batch summary section: every loaded ticker, computed in worker processes
+    with recording(session_recorder(), "Batch Summary"):
+        batch_summary_body()
+
+def batch_summary_body():
+    if st.button("Run Batch Summary"):
+        try:
+            from pipeline import run_batch
+            st.session_state.summary = run_batch(st.session_state.filtered_df)
+        except Exception as e:
+            st.error(f"Error in batch summary: {str(e)}")
+    if not st.session_state.summary.empty:
+        st.write("Batch Summary:")
+        dataframe(st.session_state.summary)
+
+@st.fragment
+def analysis_section(date_range=None):
+    # Widgets in here only rerun this fragment, not the data tables above;
+    # such a rerun is recorded as a run of its own
+    with recording(session_recorder(), "Analysis"):
+        analysis_body(date_range)
+
+def analysis_body(date_range=None):
+    from window_tensor import WINDOWS
+
+    filtered_df = st.session_state.filtered_df
+
+    # Only the tickers picked here are plotted by the analysis sections
+    loaded_tickers = cached_tickers(st.session_state.filtered_fingerprint, filtered_df)
+    plot_tickers = st.multiselect("Tickers to plot", loaded_tickers, default=loaded_tickers[:6])
+    show_kde = st.checkbox("Show KDE overlay on distributions", value=False)
+    # Answered from the precomputed multi-window tensor, so sliding is cheap
+    window = st.select_slider("Rolling window (bars)", options=WINDOWS, value=WINDOW)
+    show_forecast = st.checkbox("Overlay ARIMA forecast on price charts", value=False,
+                                help="Fits auto_arima per ticker on first use; later runs reuse the stored models")
+
+    # The last section opened stays open while the widgets above change
+    for name in ["Check Distribution", "Moving Average Analysis", "Show Bollinger Bands", "Stationarity Analysis",
+                 "Correlation Analysis", "Backtest Strategies", "Scan Alerts"]:
+        if st.button(name):
+            st.session_state.analysis = name
+    analysis = st.session_state.analysis
+
+    # Page imports are lazy, so the span covers module load as well as the page
+    with span(analysis or "No Analysis Open"):
+        forecasts = None
+        if show_forecast and analysis in ("Moving Average Analysis", "Show Bollinger Bands"):
+            try:
+                forecasts = cached_forecasts(st.session_state.filtered_fingerprint, tuple(plot_tickers), filtered_df)
+                for ticker, forecast in forecasts.items():
+                    if forecast.error:
+                        st.warning(f"No forecast for {ticker}: {forecast.error}")
+            except Exception as e:
+                st.error(f"Error in forecasting: {str(e)}")
+
+        # Distribution analysis section
+        if analysis == "Check Distribution":
+            try:
+                from distribution import check_distribution, distribution_for_daily_returns
+                check_distribution(filtered_df, tickers=plot_tickers, kde=show_kde)
+                distribution_for_daily_returns(filtered_df, tickers=plot_tickers, kde=show_kde)
+            except Exception as e:
+                st.error(f"Error in distribution analysis: {str(e)}")
+
+        # Moving average analysis section
+        if analysis == "Moving Average Analysis":
+            try:
+                from moving_avg import plot_moving_average
+                if not filtered_df.empty:
+                    plot_moving_average(filtered_df, tickers=plot_tickers, date_range=date_range, window=window,
+                                        forecasts=forecasts)
+                else:
+                    st.warning("Filtered data is empty. Please filter columns first.")
+            except Exception as e:
+                st.error(f"Error in moving average analysis: {str(e)}")
+
+        # Bollinger Bands analysis section
+        if analysis == "Show Bollinger Bands":
+            try:
+                from bollinger import plot_bollinger_bands
+                plot_bollinger_bands(filtered_df, tickers=plot_tickers, date_range=date_range, window=window,
+                                     forecasts=forecasts)
+            except Exception as e:
+                st.error(f"Error in Bollinger Bands analysis: {str(e)}")
+
+        # Stationarity analysis section
+        if analysis == "Stationarity Analysis":
+            try:
+                from stationarity import check_stationarity
+                check_stationarity(filtered_df, tickers=plot_tickers, date_range=date_range)
+            except Exception as e:
+                st.error(f"Error in stationarity analysis: {str(e)}")
+
+        # Correlation analysis section (every loaded ticker, not just the plotted ones)
+        if analysis == "Correlation Analysis":
+            try:
+                from correlation import plot_correlation
+                plot_correlation(filtered_df, tickers=plot_tickers, date_range=date_range, window=window)
+            except Exception as e:
+                st.error(f"Error in correlation analysis: {str(e)}")
+
+        # Strategy backtest section
+        if analysis == "Backtest Strategies":
+            try:
+                from performance import plot_backtest
+                plot_backtest(filtered_df, tickers=plot_tickers, date_range=date_range, window=window)
+            except Exception as e:
+                st.error(f"Error in backtest: {str(e)}")
+
+        # Alert scanner section (every loaded ticker, not just the plotted ones)
+        if analysis == "Scan Alerts":
+            try:
+                from alerts import check_alerts
+                check_alerts(filtered_df, tickers=plot_tickers, window=window)
+            except Exception as e:
+                st.error(f"Error in alert scan: {str(e)}")
+
 def main():
-    ticker, start_date, end_date = title()
+    with span("Title and Sidebar"):
+        ticker, start_date, end_date = title()
 
     # Download data section
     if st.button("Download Data"):
-        if ticker and start_date and end_date:
-            if end_date <= start_date:
-                st.error("End date must be after start date")
-                return
+        with span("Download Data"):
+            if ticker and start_date and end_date:
+                if end_date <= start_date:
+                    st.error("End date must be after start date")
+                    return
             
-            # Split tickers and remove whitespace
-            ticker_list = [t.strip() for t in ticker.split(",") if t.strip()]
-            if not ticker_list:
-                st.warning("Please provide at least one valid ticker symbol")
-                return
+                # Cleaned and upper-cased once; the store key uses the same list
+                ticker_list = normalize_tickers(ticker.split(","))
+                if not ticker_list:
+                    st.warning("Please provide at least one valid ticker symbol")
+                    return
 
-            # Download data for all tickers
-            try:
-                st.session_state.df = download_data(ticker_list, start_date, end_date)
-                st.session_state.filtered_df = st.session_state.df.copy()  # Initialize filtered_df
-                if not st.session_state.df.empty:
-                    st.write("Downloaded Data:")
-                    st.dataframe(st.session_state.df)
-                    # Save the downloaded data as a CSV in the root folder
-                    csv_filename = "data.csv"
-                    st.session_state.df.to_csv(csv_filename, index=True)
+                # Download data for all tickers
+                try:
+                    # Sessions asking for the same tickers and dates share one read-only
+                    # panel, and simultaneous requests for it collapse into one download
+                    float32 = st.session_state.float32_prices
+                    interval = st.session_state.interval
+                    key = SharedStore.make_key(ticker_list, start_date, end_date, float32=float32, interval=interval)
+                    handle = shared_store().acquire(key, lambda: normalize_panel(
+                        download_data(ticker_list, start_date, end_date, interval=interval), float32=float32,
+                    ))
+                    if st.session_state.get('dataset_handle') is not None:
+                        st.session_state.dataset_handle.release()
+                    st.session_state.dataset_handle = handle
+                    st.session_state.df = handle.df
+                    set_filtered_df(st.session_state.df)  # Initialize filtered_df; a view, not a copy
+                    st.session_state.summary = pd.DataFrame()
+                    if not st.session_state.df.empty:
+                        # Save the downloaded data as a memory-mappable snapshot
+                        store = SnapshotStore()
+                        store.save(st.session_state.df, "data")
+                        store.save_view("filtered", st.session_state.df.columns.tolist())
                 
+                except Exception as e:
+                    st.error(f"Error downloading data: {str(e)}")
+            else:
+                st.warning("Please provide ticker symbol(s) and date range")
+
+    # Reopening a snapshot only maps the files; columns are read when touched
+    store = SnapshotStore()
+    if store.exists("data") and st.sidebar.button("Load Last Snapshot"):
+        with span("Load Snapshot"):
+            try:
+                df = normalize_panel(store.open("data"), float32=st.session_state.float32_prices)
+                # The shared panel this replaces is no longer used by this session
+                if st.session_state.get('dataset_handle') is not None:
+                    st.session_state.dataset_handle.release()
+                    st.session_state.dataset_handle = None
+                st.session_state.df = df
+                filtered_df = store.open_view("filtered") if store.view_exists("filtered") else st.session_state.df
+                set_filtered_df(normalize_panel(filtered_df, float32=st.session_state.float32_prices))
+                st.session_state.summary = pd.DataFrame()
             except Exception as e:
-                st.error(f"Error downloading data: {str(e)}")
-        else:
-            st.warning("Please provide ticker symbol(s) and date range")
+                st.error(f"Error loading snapshot: {str(e)}")
 
     # Always display downloaded data if available
     if not st.session_state.df.empty:
-        st.write("Current Data:")
-        st.dataframe(st.session_state.df)
+        with span("Current Data Table"):
+            st.write("Current Data:")
+            stats = shared_store().stats()
+            st.caption(
+                f"In memory: {memory_bytes(st.session_state.df) / 1e6:.1f} MB "
+                f"(server-wide: {stats['datasets']} shared dataset(s), {stats['bytes'] / 1e6:.1f} MB)"
+            )
+            dataframe(st.session_state.df)
 
     # Column filtering section
     if not st.session_state.df.empty:
+        from bars import RESAMPLE_RULES, resample_ohlcv
+
         cols = st.multiselect(
             "Select columns to keep",
             st.session_state.df.columns.tolist(),
             default=st.session_state.df.columns.tolist()
         )
+        # Aggregating to coarser bars (first/max/min/last/sum per field) goes with the column filter
+        rule = st.selectbox("Resample bars to", ["Keep bar size"] + RESAMPLE_RULES)
         
         if st.button("Filter Columns"):
-            try:
-                st.session_state.filtered_df = filter_columns(st.session_state.df, cols)
-                if not st.session_state.filtered_df.empty:
-                    st.write("Filtered Data:")
-                    st.dataframe(st.session_state.filtered_df)
-                    # Save filtered data as CSV
-                    filtered_csv_filename = "filtered_data.csv"
-                    st.session_state.filtered_df.to_csv(filtered_csv_filename, index=True)
-                else:
-                    st.warning("Filtered data is empty. Please select valid columns.")
-            except Exception as e:
-                st.error(f"Error filtering columns: {str(e)}")
+            with span("Filter Columns"):
+                try:
+                    filtered_df = filter_columns(st.session_state.df, cols)
+                    if rule in RESAMPLE_RULES and not filtered_df.empty:
+                        filtered_df = resample_ohlcv(filtered_df, rule)
+                    set_filtered_df(filtered_df)
+                    st.session_state.summary = pd.DataFrame()
+                    if not st.session_state.filtered_df.empty:
+                        # The filtered data is saved as a column selection on the data snapshot
+                        # (the bar size is not; resample again after loading it)
+                        SnapshotStore().save_view("filtered", st.session_state.filtered_df.columns.tolist())
+                    else:
+                        st.warning("Filtered data is empty. Please select valid columns.")
+                except Exception as e:
+                    st.error(f"Error filtering columns: {str(e)}")
         
         # Always display filtered data if available
         if not st.session_state.filtered_df.empty:
-            st.write("Current Filtered Data:")
-            st.dataframe(st.session_state.filtered_df)
-            # Data description section
-            describe_data(st.session_state.filtered_df)
-            # Line chart section
-            create_line_chart(st.session_state.filtered_df)
-
-        # Distribution analysis section
-        if st.button("Check Distribution"):
-            try:
-                check_distribution(st.session_state.filtered_df)
-                ticker_list = [t.strip() for t in ticker.split(",") if t.strip()]
-                distribution_for_daily_returns(st.session_state.filtered_df, tickers=ticker_list)
-            except Exception as e:
-                st.error(f"Error in distribution analysis: {str(e)}")
+            with span("Filtered Data Table"):
+                st.write("Current Filtered Data:")
+                dataframe(st.session_state.filtered_df)
+            # Data description section (memoized on the filtered data's fingerprint)
+            with span("Describe Data"):
+                describe_data(
+                    st.session_state.filtered_df,
+                    summary=cached_summary(st.session_state.filtered_fingerprint, st.session_state.filtered_df),
+                )
+            # Zooming in re-slices the data, so narrow ranges are drawn at full resolution
+            index = st.session_state.filtered_df.index
+            with st.sidebar:
+                date_range = st.slider(
+                    "Chart date range",
+                    min_value=index.min().date(),
+                    max_value=index.max().date(),
+                    value=(index.min().date(), index.max().date()),
+                )
 
+            # Line chart section
+            with span("Line Chart"):
+                create_line_chart(st.session_state.filtered_df, date_range=date_range)
 
-        # Moving average analysis section
-        if st.button("Moving Average Analysis"):
-            try:
-                if not st.session_state.filtered_df.empty:
-                    ticker_list = [t.strip() for t in ticker.split(",") if t.strip()]
-                    plot_moving_average(st.session_state.filtered_df, tickers=ticker_list)
-                else:
-                    st.warning("Filtered data is empty. Please filter columns first.")
-            except Exception as e:
-                st.error(f"Error in moving average analysis: {str(e)}")
-        
+            batch_summary_section()
+            analysis_section(date_range)
 
-        # Bollinger Bands analysis section
-        if st.button("Show Bollinger Bands"):
-            try:
-                ticker_list = [t.strip() for t in ticker.split(",") if t.strip()]
-                plot_bollinger_bands(st.session_state.filtered_df, tickers=ticker_list)
-            except Exception as e:
-                st.error(f"Error in Bollinger Bands analysis: {str(e)}")
-        
     else:
         st.info("No data available. Please download data first.")
 
-# Ensure the root folder exists for saving CSV files
-
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # With diagnostics on, the whole script run is one recorded run and the
+    # sections above are spans inside it
+    recorder = diagnostics_controls()
+    with recording(recorder, "Script"):
+        main()
+    diagnostics_panel(recorder)
\ No newline at end of file
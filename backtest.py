@@ -0,0 +1,205 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from bars import periods_per_year
+from indicators import WINDOW, close_prices
+from instrumentation import instrumented
+from pipeline import CHUNK_SIZE, MIN_PARALLEL_TICKERS, shard
+from window_tensor import K, rolling_mean_std
+
+STRATEGIES = ("bollinger", "ma_crossover")
+PERIODS_PER_YEAR = 252
+# Charged per unit of position change, as a fraction of the price (5 bps)
+COST = 0.0005
+
+GRIDS = {
+    "bollinger": {"window": list(range(10, 110, 10)), "k": [1.0, 1.5, 2.0, 2.5, 3.0]},
+    "ma_crossover": {"fast": [5, 10, 20, 30, 50], "slow": [50, 100, 150, 200]},
+}
+
+METRICS = ["total_return", "annual_return", "volatility", "sharpe", "max_drawdown", "trades", "exposure"]
+
+
+@dataclass(frozen=True)
+class BacktestResult:
+    # Wide (Date x ticker) frames plus one summary row per ticker
+    positions: pd.DataFrame
+    returns: pd.DataFrame
+    equity: pd.DataFrame
+    summary: pd.DataFrame
+
+
+def _forward_fill(events: np.ndarray) -> np.ndarray:
+    # Carry the last non-NaN event along time (last axis); 0 before the first
+    t = events.shape[-1]
+    known = ~np.isnan(events)
+    last = np.where(known, np.arange(t), -1)
+    np.maximum.accumulate(last, axis=-1, out=last)
+    filled = np.take_along_axis(events, np.maximum(last, 0), axis=-1)
+    return np.where(last >= 0, filled, 0.0)
+
+
+def bollinger_positions(values: np.ndarray, sma: np.ndarray, std: np.ndarray, k: float = K,
+                        long_only: bool = False) -> np.ndarray:
+    # Mean reversion: go long below the lower band, short above the upper band
+    # (flat instead when long_only), and close out when price crosses the mean
+    with np.errstate(invalid="ignore"):
+        side = np.sign(values - sma)
+        crossed = np.zeros_like(side, dtype=bool)
+        crossed[:, 1:] = side[:, 1:] != side[:, :-1]
+        events = np.where(crossed & ~np.isnan(sma), 0.0, np.nan)
+        events[values < sma - k * std] = 1.0
+        events[values > sma + k * std] = 0.0 if long_only else -1.0
+    return _forward_fill(events)
+
+
+def crossover_positions(fast: np.ndarray, slow: np.ndarray, long_only: bool = False) -> np.ndarray:
+    # Trend following: long while the fast mean is above the slow one
+    with np.errstate(invalid="ignore"):
+        positions = np.where(fast > slow, 1.0, 0.0 if long_only else -1.0)
+    return np.where(np.isnan(fast) | np.isnan(slow), 0.0, positions)
+
+
+def evaluate(values: np.ndarray, positions: np.ndarray, cost: float = COST,
+             periods: float = PERIODS_PER_YEAR) -> tuple:
+    # values and positions are (ticker, time). A position taken at bar t's
+    # close earns the return from t to t + 1; changing it costs `cost` per unit.
+    # `periods` is bars per year, for the annualised figures.
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = values[:, 1:] / values[:, :-1] - 1
+    listed = ~np.isnan(returns)
+    returns = np.where(listed, returns, 0.0)
+    held = positions[:, :-1]
+    turnover = np.abs(np.diff(positions[:, :-1], axis=1, prepend=0.0))
+    strategy = held * returns - cost * turnover
+    strategy = np.concatenate([np.zeros((len(values), 1)), strategy], axis=1)
+
+    equity = np.cumprod(1 + strategy, axis=1)
+    drawdown = equity / np.maximum.accumulate(equity, axis=1) - 1
+    bars = listed.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = strategy[:, 1:].sum(axis=1) / bars
+        var = (np.where(listed, strategy[:, 1:] - mean[:, None], 0.0) ** 2).sum(axis=1) / (bars - 1)
+        std = np.sqrt(var)
+        summary = {
+            "total_return": equity[:, -1] - 1,
+            "annual_return": equity[:, -1] ** (periods / bars) - 1,
+            "volatility": std * np.sqrt(periods),
+            "sharpe": np.where(std > 0, mean / std, np.nan) * np.sqrt(periods),
+            "max_drawdown": drawdown.min(axis=1),
+            "trades": (turnover > 0).sum(axis=1),
+            "exposure": (np.abs(held) * listed).sum(axis=1) / bars,
+        }
+    return strategy, equity, summary
+
+
+def _windows(strategy: str, grid: list) -> tuple:
+    if strategy == "bollinger":
+        return tuple(sorted({params["window"] for params in grid}))
+    return tuple(sorted({params["fast"] for params in grid} | {params["slow"] for params in grid}))
+
+
+def _positions(strategy: str, values: np.ndarray, sma: dict, std: dict, params: dict, long_only: bool) -> np.ndarray:
+    if strategy == "bollinger":
+        window = params["window"]
+        return bollinger_positions(values, sma[window], std[window], params["k"], long_only)
+    return crossover_positions(sma[params["fast"]], sma[params["slow"]], long_only)
+
+
+def expand_grid(strategy: str, grid: dict = None) -> list:
+    # Cartesian product of the parameter lists; crossovers need fast < slow
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+    grid = grid or GRIDS[strategy]
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    if strategy == "ma_crossover":
+        combos = [params for params in combos if params["fast"] < params["slow"]]
+    return combos
+
+
+@instrumented
+def backtest(df: pd.DataFrame, strategy: str = "bollinger", tickers: list = None, cost: float = COST,
+             long_only: bool = False, **params) -> BacktestResult:
+    # One parameter set over every ticker at once
+    close = close_prices(df)
+    if tickers is not None:
+        close = close[[t.strip() for t in tickers if t.strip() in close.columns]]
+    defaults = {"bollinger": {"window": WINDOW, "k": K}, "ma_crossover": {"fast": 20, "slow": 100}}
+    combos = expand_grid(strategy, {name: [value] for name, value in {**defaults[strategy], **params}.items()})
+    if not combos:
+        raise ValueError("the fast window must be shorter than the slow window")
+    params = combos[0]
+
+    values = close.to_numpy(dtype=np.float64, na_value=np.nan).T
+    windows = _windows(strategy, [params])
+    sma, std = rolling_mean_std(values, windows)
+    positions = _positions(strategy, values, dict(zip(windows, sma)), dict(zip(windows, std)), params, long_only)
+    returns, equity, summary = evaluate(values, positions, cost, periods_per_year(close.index))
+
+    def frame(array):
+        return pd.DataFrame(array.T, index=close.index, columns=close.columns)
+
+    summary = pd.DataFrame(summary, index=close.columns)
+    summary.index.name = "Ticker"
+    return BacktestResult(frame(positions), frame(returns), frame(equity), summary)
+
+
+def sweep_chunk(close: pd.DataFrame, strategy: str, grid: list, cost: float = COST,
+                long_only: bool = False, periods: float = PERIODS_PER_YEAR) -> pd.DataFrame:
+    # Every parameter set for one shard of tickers (runs inside a worker
+    # process). The rolling sums behind all windows are computed once.
+    values = close.to_numpy(dtype=np.float64, na_value=np.nan).T
+    windows = _windows(strategy, grid)
+    sma, std = rolling_mean_std(values, windows)
+    sma, std = dict(zip(windows, sma)), dict(zip(windows, std))
+
+    rows = []
+    for params in grid:
+        positions = _positions(strategy, values, sma, std, params, long_only)
+        _, _, summary = evaluate(values, positions, cost, periods)
+        rows.append(pd.DataFrame({**params, "Ticker": close.columns, **summary}))
+    return pd.concat(rows, ignore_index=True)
+
+
+@instrumented
+def sweep(df: pd.DataFrame, strategy: str = "bollinger", grid: dict = None, tickers: list = None,
+          cost: float = COST, long_only: bool = False, chunk_size: int = CHUNK_SIZE,
+          max_workers: int = None) -> pd.DataFrame:
+    # Parameter grid x ticker universe. Tickers are sharded as in
+    # pipeline.run_batch and each shard runs the whole grid in a worker.
+    close = close_prices(df)
+    if tickers is None:
+        tickers = close.columns.tolist()
+    tickers = [t.strip() for t in tickers if t.strip() in close.columns]
+    combos = expand_grid(strategy, grid)
+    if not tickers or not combos:
+        return pd.DataFrame()
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if len(tickers) < MIN_PARALLEL_TICKERS:
+        max_workers = 1
+    chunk_size = max(1, min(chunk_size, -(-len(tickers) // max_workers)))
+    chunks = [close[chunk] for chunk in shard(tickers, chunk_size)]
+    periods = periods_per_year(close.index)
+    if len(chunks) == 1 or max_workers == 1:
+        results = [sweep_chunk(chunk, strategy, combos, cost, long_only, periods) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            n = len(chunks)
+            results = list(executor.map(
+                sweep_chunk, chunks, [strategy] * n, [combos] * n, [cost] * n, [long_only] * n, [periods] * n,
+            ))
+    return pd.concat(results, ignore_index=True)
+
+
+def rank_params(results: pd.DataFrame, metric: str = "sharpe") -> pd.DataFrame:
+    # Median of each metric across tickers per parameter set, best first
+    params = [column for column in results.columns if column not in METRICS and column != "Ticker"]
+    ranked = results.groupby(params)[METRICS].median()
+    return ranked.sort_values(metric, ascending=False).reset_index()
@@ -0,0 +1,169 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+
+# How far back Yahoo serves each intraday interval, and the longest range
+# one request may span; longer requests are split
+MAX_LOOKBACK_DAYS = {"1h": 729, "30m": 59, "15m": 59, "5m": 59, "2m": 59, "1m": 29}
+MAX_REQUEST_DAYS = {"1m": 7}
+# Coarser bar sizes the loaded panel can be aggregated to (pandas offset aliases)
+RESAMPLE_RULES = ["5min", "15min", "30min", "1h", "1D", "W", "ME"]
+TRADING_DAYS = 252
+# Rows x columns of one block in resample_ohlcv, bounding its working memory
+CHUNK_CELLS = 4_000_000
+
+# How each OHLCV field aggregates; any other column keeps its last value
+AGGREGATIONS = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+# Period aliases for the month/quarter/year-end offset aliases
+_PERIOD_ALIASES = {"ME": "M", "QE": "Q", "YE": "Y"}
+
+
+def clip_to_lookback(start, end, interval: str) -> date:
+    # Latest start Yahoo will serve for this interval (daily bars go back indefinitely)
+    start = pd.Timestamp(start).date()
+    days = MAX_LOOKBACK_DAYS.get(interval)
+    if days is None:
+        return start
+    return max(start, min(pd.Timestamp(end).date(), date.today()) - timedelta(days=days))
+
+
+def request_ranges(start, end, interval: str) -> list:
+    # [start, end) split into the longest ranges one request may cover
+    start, end = pd.Timestamp(start).date(), pd.Timestamp(end).date()
+    days = MAX_REQUEST_DAYS.get(interval)
+    if days is None:
+        return [(start, end)]
+    ranges = []
+    while start < end:
+        ranges.append((start, min(end, start + timedelta(days=days))))
+        start = ranges[-1][1]
+    return ranges
+
+
+def bar_spacing(index: pd.DatetimeIndex) -> pd.Timedelta:
+    # Typical gap between bars, from the most recent stretch of the index
+    if len(index) < 2:
+        return pd.Timedelta(days=1)
+    return pd.Series(index[-min(len(index), 1000):]).diff().median()
+
+
+def is_intraday(index: pd.DatetimeIndex) -> bool:
+    return bar_spacing(index) < pd.Timedelta(hours=20)
+
+
+def bars_per_session(index: pd.DatetimeIndex) -> int:
+    # Bars in a typical (median) trading session
+    if not len(index):
+        return 1
+    days = index.normalize().asi8
+    counts = np.diff(np.flatnonzero(np.r_[True, days[1:] != days[:-1], True]))
+    return max(1, int(np.median(counts)))
+
+
+def periods_per_year(index: pd.DatetimeIndex) -> float:
+    # Bars per year on a trading calendar: sessions x bars per session for
+    # intraday bars, 252 trading days for daily bars
+    if is_intraday(index):
+        return float(TRADING_DAYS * bars_per_session(index))
+    step = bar_spacing(index)
+    if step < pd.Timedelta(days=4):
+        return float(TRADING_DAYS)
+    return max(1.0, pd.Timedelta(days=365.25) / step)
+
+
+def seasonal_period(index: pd.DatetimeIndex) -> int:
+    # Decomposition period for the bar size: one session for intraday bars,
+    # one trading year (not 365 calendar days) for daily and coarser bars
+    if is_intraday(index):
+        return max(2, bars_per_session(index))
+    return max(2, int(round(periods_per_year(index))))
+
+
+def bin_starts(index: pd.DatetimeIndex, rule: str) -> tuple:
+    # Row offsets where each output bar begins, and the output bar labels.
+    # Intraday rules are anchored on each session's first bar (so hourly bars
+    # start at 9:30 like the exchange's); daily and coarser rules use calendar
+    # periods labelled by their first day. The index must be sorted.
+    offset = pd.tseries.frequencies.to_offset(rule)
+    index = index.as_unit("ns")
+    try:
+        step = pd.Timedelta(offset)
+    except (TypeError, ValueError):
+        step = None
+    stamps = index.asi8
+    if step is not None and step < pd.Timedelta(days=1):
+        days = index.normalize().asi8
+        session_open = np.where(np.r_[True, days[1:] != days[:-1]], stamps, np.iinfo(np.int64).min)
+        session_open = np.maximum.accumulate(session_open)
+        keys = session_open + (stamps - session_open) // step.value * step.value
+    elif step is not None:
+        keys = index.floor(offset).asi8
+    else:
+        periods = index.to_period(_PERIOD_ALIASES.get(offset.name, offset.name))
+        keys = periods.start_time.as_unit("ns").asi8
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=np.int64)
+    return starts, pd.DatetimeIndex(keys[starts], name=index.name)
+
+
+def _aggregate(values: np.ndarray, starts: np.ndarray, how: str) -> np.ndarray:
+    # One reduction over (rows x columns) per bin; NaNs are skipped and a bin
+    # with no valid value stays NaN
+    valid = ~np.isnan(values)
+    if how == "max":
+        return np.fmax.reduceat(values, starts, axis=0)
+    if how == "min":
+        return np.fmin.reduceat(values, starts, axis=0)
+    if how == "sum":
+        total = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0, dtype=np.float64)
+        count = np.add.reduceat(valid, starts, axis=0, dtype=np.int64)
+        return np.where(count > 0, total, np.nan)
+    rows = np.arange(len(values))[:, None]
+    if how == "first":
+        pos = np.minimum.reduceat(np.where(valid, rows, len(values)), starts, axis=0)
+        found = pos < len(values)
+    else:
+        pos = np.maximum.reduceat(np.where(valid, rows, -1), starts, axis=0)
+        found = pos >= 0
+    picked = np.take_along_axis(values, np.clip(pos, 0, len(values) - 1), axis=0)
+    return np.where(found, picked, np.nan)
+
+
+@instrumented
+def resample_ohlcv(df: pd.DataFrame, rule: str, chunk_cells: int = CHUNK_CELLS) -> pd.DataFrame:
+    # Aggregate a (Price, Ticker) panel to coarser bars: first Open, max
+    # High, min Low, last Close, summed Volume, for every ticker at once.
+    # Rows are processed in blocks of whole output bars holding at most
+    # `chunk_cells` values per field group, so a memory-mapped multi-million
+    # row panel is never materialised in full. Float32 prices stay float32.
+    if df.empty:
+        return df
+    df = df.sort_index() if not df.index.is_monotonic_increasing else df
+    starts, labels = bin_starts(pd.DatetimeIndex(df.index), rule)
+
+    fields = df.columns.get_level_values(0) if isinstance(df.columns, pd.MultiIndex) else df.columns
+    groups = {}
+    for position, field in enumerate(fields):
+        groups.setdefault(AGGREGATIONS.get(field, "last"), []).append(position)
+
+    rows_per_block = max(1, chunk_cells // max(1, max(len(p) for p in groups.values())))
+    cuts = np.unique(starts[np.searchsorted(starts, np.arange(0, len(df), rows_per_block), side="right") - 1])
+    edges = np.r_[cuts, len(df)]
+
+    out = {}
+    for how, positions in groups.items():
+        dtypes = df.dtypes.iloc[positions]
+        dtype = np.float32 if how != "sum" and (dtypes == np.float32).all() else np.float64
+        result = np.empty((len(starts), len(positions)), dtype=dtype)
+        for a, b in zip(edges[:-1], edges[1:]):
+            first, last = np.searchsorted(starts, [a, b])
+            block = df.iloc[a:b, positions].to_numpy(dtype=dtype, na_value=np.nan)
+            result[first:last] = _aggregate(block, starts[first:last] - a, how)
+        for i, position in enumerate(positions):
+            out[position] = result[:, i]
+
+    resampled = pd.DataFrame({i: out[i] for i in range(len(fields))}, index=labels)
+    resampled.columns = df.columns
+    return resampled
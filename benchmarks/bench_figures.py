@@ -0,0 +1,105 @@
+# Figure-construction benchmark for the 6-ticker subplot grids.
+#
+# Compares the old approach (one px figure per series, then copying its
+# traces into a make_subplots grid) with figures.add_lines, which builds
+# go.Scatter traces straight from NumPy arrays.
+#
+#   python benchmarks/bench_figures.py [--rows 5000] [--repeat 5] [--json out.json]
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from figures import add_lines, grid_position, subplot_grid  # noqa: E402
+from indicators import compute_indicators  # noqa: E402
+
+TICKERS = ["T1", "T2", "T3", "T4", "T5", "T6"]
+
+
+def make_close(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range("2000-01-03", periods=rows, name="Date")
+    steps = rng.normal(0.0003, 0.02, size=(rows, len(TICKERS)))
+    return pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)), index=index, columns=TICKERS)
+
+
+def px_grid(close: pd.DataFrame, indicators):
+    # The pre-figures.py moving-average grid: px figure per series, traces copied over
+    fig, _ = subplot_grid([f"{t} Stock Price with Rolling Statistics" for t in TICKERS])
+    for i, ticker in enumerate(TICKERS):
+        row, col_idx = grid_position(i)
+        plot_df = pd.DataFrame({
+            ticker: close[ticker],
+            f"{ticker}_rolling_mean": indicators.rolling_mean[ticker],
+            f"{ticker}_rolling_std": indicators.rolling_std[ticker],
+        }).reset_index()
+        for column, color in [(ticker, "white"), (f"{ticker}_rolling_mean", "red"), (f"{ticker}_rolling_std", "green")]:
+            line_fig = px.line(plot_df, x="Date", y=column, color_discrete_sequence=[color])
+            for trace in line_fig.data:
+                fig.add_trace(trace, row=row, col=col_idx)
+    return fig
+
+
+def go_grid(close: pd.DataFrame, indicators, n_out: int):
+    fig, _ = subplot_grid([f"{t} Stock Price with Rolling Statistics" for t in TICKERS])
+    for i, ticker in enumerate(TICKERS):
+        row, col_idx = grid_position(i)
+        add_lines(fig, close.index, [
+            (close[ticker].to_numpy(), f"{ticker} Price", "white"),
+            (indicators.rolling_mean[ticker].to_numpy(), "Rolling Mean", "red"),
+            (indicators.rolling_std[ticker].to_numpy(), "Rolling Std", "green"),
+        ], row=row, col=col_idx, n_out=n_out)
+    return fig
+
+
+def measure(build, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = build()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fig = build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "best_seconds": min(timings),
+        "median_seconds": float(np.median(timings)),
+        "peak_alloc_bytes": peak,
+        "payload_bytes": len(fig.to_json()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark figure construction for the 6-ticker grids")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    close = make_close(args.rows)
+    indicators = compute_indicators(close)
+    results = {
+        "rows": args.rows,
+        "tickers": len(TICKERS),
+        "px_then_copy": measure(lambda: px_grid(close, indicators), args.repeat),
+        # Same full-resolution traces, so only the construction path differs
+        "graph_objects": measure(lambda: go_grid(close, indicators, n_out=args.rows), args.repeat),
+        "graph_objects_downsampled": measure(lambda: go_grid(close, indicators, n_out=2000), args.repeat),
+    }
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
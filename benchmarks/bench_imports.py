@@ -0,0 +1,131 @@
+# Cold-start import profile for the app and the headless CLI.
+#
+# Runs `python -X importtime -c "import <target>"` in fresh interpreters and
+# reports the cumulative import time of each target, its heaviest direct
+# imports, which of the repo's own modules it loads and any heavy dependency
+# that got loaded at module level. With --check the run is compared against
+# benchmarks/import_baseline.json and exits non-zero on a regression, so it
+# can gate CI; --update rewrites the baseline after an intended change.
+# Wall-clock import time is noisy, so the time gate compares medians with a
+# relative tolerance; the module gates are exact.
+#
+#   python benchmarks/bench_imports.py [--repeat 5] [--json out.json] [--check | --update]
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "import_baseline.json")
+
+TARGETS = ["app", "analytics", "main"]
+
+# Dependencies that must only load inside the section (or command) that needs them
+HEAVY = ["yfinance", "statsmodels", "scipy", "pmdarima", "sklearn", "seaborn", "matplotlib", "plotly.express"]
+
+# A run fails --check when its median is this much slower than the baseline's
+TOLERANCE = 1.5
+
+
+def parse_importtime(stderr: str) -> list:
+    # -X importtime lines: "import time: self [us] | cumulative | <indent>module"
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2]
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append({"module": name.strip(), "self_us": self_us, "cumulative_us": cumulative_us, "depth": depth})
+    return rows
+
+
+def profile(target: str) -> dict:
+    # Streamlit's bare-mode warnings go to stderr too; only importtime lines are parsed
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {target} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    # A module is printed after its imports, so the target's subtree is the
+    # run of nested rows just before it (interpreter start-up rows excluded)
+    end = max(i for i, row in enumerate(rows) if row["module"] == target and row["depth"] == 0)
+    start = end
+    while start > 0 and rows[start - 1]["depth"] > 0:
+        start -= 1
+    subtree = rows[start:end]
+    loaded = {row["module"] for row in subtree}
+    return {
+        "total_us": rows[end]["cumulative_us"],
+        "direct": {row["module"]: row["cumulative_us"] for row in subtree if row["depth"] == 1},
+        "heavy": [name for name in HEAVY if name in loaded],
+        "local": sorted(name for name in loaded if os.path.exists(os.path.join(ROOT, f"{name}.py"))),
+    }
+
+
+def measure(target: str, repeat: int) -> dict:
+    runs = [profile(target) for _ in range(repeat)]
+    best = min(runs, key=lambda run: run["total_us"])
+    totals = sorted(run["total_us"] for run in runs)
+    return {
+        "best_seconds": best["total_us"] / 1e6,
+        "median_seconds": totals[len(totals) // 2] / 1e6,
+        "heaviest_imports": dict(sorted(best["direct"].items(), key=lambda item: -item[1])[:8]),
+        "heavy_modules": best["heavy"],
+        "local_modules": best["local"],
+    }
+
+
+def check(results: dict, baseline: dict) -> list:
+    failures = []
+    for target, result in results["targets"].items():
+        expected = baseline.get("targets", {}).get(target)
+        if expected is None:
+            continue
+        limit = expected["median_seconds"] * TOLERANCE
+        if result["median_seconds"] > limit:
+            failures.append(f"{target}: median {result['median_seconds']:.3f}s > {limit:.3f}s "
+                            f"(baseline median {expected['median_seconds']:.3f}s x {TOLERANCE})")
+        new_local = sorted(set(result["local_modules"]) - set(expected.get("local_modules", result["local_modules"])))
+        if new_local:
+            failures.append(f"{target}: now imports {', '.join(new_local)} at module level")
+        new_heavy = sorted(set(result["heavy_modules"]) - set(expected["heavy_modules"]))
+        if new_heavy:
+            failures.append(f"{target}: now imports {', '.join(new_heavy)} at module level")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile cold-start import time of the app and CLI")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--check", action="store_true", help="fail if slower than the recorded baseline")
+    group.add_argument("--update", action="store_true", help="record this run as the new baseline")
+    args = parser.parse_args()
+
+    results = {
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "targets": {target: measure(target, args.repeat) for target in TARGETS},
+    }
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.update:
+        with open(BASELINE, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.check:
+        with open(BASELINE) as f:
+            failures = check(results, json.load(f))
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
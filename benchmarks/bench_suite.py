@@ -0,0 +1,212 @@
+# Benchmark suite over every analysis path, on seeded synthetic OHLCV panels.
+#
+# Each --size is TICKERSxYEARSxFREQ (e.g. 100x5x1D, 20x1x1min). For every
+# panel it times and memory-profiles the engine functions (column filtering,
+# describe, indicator math, histograms, seasonal decomposition, the alert
+# scan) and the page functions that also build the plotly figures. The page
+# functions run in Streamlit's bare mode, so no server or browser is
+# involved, and the data is generated locally, so no network either.
+# Caches are cleared before every run so each timing is a cold computation.
+#
+#   python benchmarks/bench_suite.py [--size 6x20x1D --size 100x5x1D] [--repeat 3]
+#                                    [--json out.json] [--compare baseline.json [--tolerance 1.5]]
+import argparse
+import atexit
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_panel  # noqa: E402
+
+DEFAULT_SIZES = ["6x20x1D", "100x5x1D", "6x1x1min"]
+# Page functions draw one panel per ticker, so they get the first few only
+PAGE_TICKERS = 6
+# Seasonal decomposition (plus ADF/KPSS) is per series; cap the batch
+DECOMPOSE_TICKERS = 6
+
+
+def parse_size(size: str) -> dict:
+    tickers, years, freq = size.split("x")
+    return {"tickers": int(tickers), "years": float(years), "freq": freq}
+
+
+def quiet_streamlit():
+    # Bare-mode st.* calls log "missing ScriptRunContext" warnings on every
+    # call, and Streamlit resets its own logger levels once its config loads
+    logging.disable(logging.WARNING)
+    warnings.simplefilter("ignore")
+
+
+def clear_caches():
+    import decomposition
+    import indicators
+    import window_tensor
+
+    indicators.clear_cache()
+    window_tensor.clear_cache()
+    with decomposition._lock:
+        decomposition._cache.clear()
+
+
+def cases(df: pd.DataFrame) -> dict:
+    from analytics import bollinger_table, select_columns, summarize
+    from bars import is_intraday, resample_ohlcv
+    from bollinger import plot_bollinger_bands
+    from chunked import chunked_statistics
+    from decomposition import decompose_series
+    from distribution import check_distribution, distribution_for_daily_returns
+    from filter_cols import describe_data, filter_columns
+    from histograms import histogram_matrix, moments
+    from indicators import close_prices, compute_indicators
+    from moving_avg import plot_moving_average
+    from scanner import scan
+    from snapshot import SnapshotStore
+    from stationarity import check_stationarity
+    from window_tensor import compute_window_tensor
+
+    close = close_prices(df)
+    tickers = close.columns.tolist()
+    shown = tickers[:PAGE_TICKERS]
+    cols = [col for col in df.columns if col[0] in ("Close", "Volume")]
+    # Intraday panels aggregate to daily bars, daily panels to weekly
+    rule = "1D" if is_intraday(df.index) else "W"
+
+    def decompose():
+        return [decompose_series(close[t]) for t in tickers[:DECOMPOSE_TICKERS]]
+
+    def histograms():
+        daily_return = close.pct_change()
+        return histogram_matrix(close), moments(close), histogram_matrix(daily_return), moments(daily_return)
+
+    # The same statistics streamed from an on-disk snapshot in time blocks
+    snapshot_dir = tempfile.mkdtemp(prefix="bench_snapshots_")
+    atexit.register(shutil.rmtree, snapshot_dir, True)
+    snapshots = SnapshotStore(snapshot_dir)
+    snapshots.save(df, "panel")
+    reader = snapshots.reader("panel")
+
+    return {
+        # Engine
+        "select_columns": lambda: select_columns(df, cols),
+        "resample_ohlcv": lambda: resample_ohlcv(df, rule),
+        "summarize": lambda: summarize(df),
+        "compute_indicators": lambda: compute_indicators(close),
+        "window_tensor": lambda: compute_window_tensor(close[shown]),
+        "bollinger_table": lambda: bollinger_table(df),
+        "histograms": histograms,
+        "chunked_statistics": lambda: chunked_statistics(reader, mode="time", budget=64 * 2 ** 20),
+        "scan_alerts": lambda: scan(df, bars=20),
+        # Every bar scanned, so the windows reach back past the first row
+        "scan_history": lambda: scan(df, bars=len(df)),
+        "seasonal_decompose": decompose,
+        # Pages, including figure construction and serialization
+        "filter_columns": lambda: filter_columns(df, cols),
+        "describe_data": lambda: describe_data(df),
+        "plot_moving_average": lambda: plot_moving_average(df, shown),
+        "plot_bollinger_bands": lambda: plot_bollinger_bands(df, shown),
+        "check_distribution": lambda: (check_distribution(df, shown), distribution_for_daily_returns(df, shown)),
+        "check_stationarity": lambda: check_stationarity(df, shown),
+    }
+
+
+def measure(run, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    clear_caches()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "best_seconds": min(timings),
+        "median_seconds": float(np.median(timings)),
+        "peak_alloc_bytes": peak,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    # Cases whose best time grew by more than `tolerance` x the baseline
+    slower = []
+    for size, panel in results["panels"].items():
+        for name, current in panel["cases"].items():
+            before = baseline.get("panels", {}).get(size, {}).get("cases", {}).get(name)
+            if before and current["best_seconds"] > tolerance * before["best_seconds"]:
+                slower.append(f"{size} {name}: {before['best_seconds']:.4f}s -> {current['best_seconds']:.4f}s")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every analysis path on synthetic OHLCV panels")
+    parser.add_argument("--size", action="append", help="TICKERSxYEARSxFREQ, repeatable (default: %s)"
+                        % " ".join(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--case", action="append", help="only run these cases")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown factor for --compare")
+    args = parser.parse_args()
+
+    quiet_streamlit()
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "panels": {},
+    }
+    for size in args.size or DEFAULT_SIZES:
+        config = parse_size(size)
+        df = synthetic_panel(seed=args.seed, **config)
+        panel = {**config, "rows": len(df), "columns": df.shape[1], "cases": {}}
+        for name, run in cases(df).items():
+            if args.case and name not in args.case:
+                continue
+            panel["cases"][name] = measure(run, args.repeat)
+            print(f"{size:>14} {name:<22} {panel['cases'][name]['best_seconds']:9.4f}s "
+                  f"{panel['cases'][name]['peak_alloc_bytes'] / 2 ** 20:9.1f} MiB", file=sys.stderr)
+        results["panels"][size] = panel
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(results, json.load(f), args.tolerance)
+        for line in slower:
+            print(f"slower: {line}", file=sys.stderr)
+        sys.exit(1 if slower else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Seeded synthetic OHLCV panels in the yfinance layout: (Price, Ticker)
+# MultiIndex columns ordered Close, High, Low, Open, Volume and a "Date"
+# index. Used by the benchmarks so they need neither the network nor the
+# checked-in data.csv.
+#
+#   from synthetic import synthetic_panel
+#   df = synthetic_panel(tickers=100, years=5, freq="1h", seed=0)
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+# Regular session, 9:30 to 16:00
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+SESSION_MINUTES = 390
+BAR_MINUTES = {"1D": SESSION_MINUTES, "1h": 60, "30min": 30, "15min": 15, "5min": 5, "1min": 1}
+PRICES = ["Close", "High", "Low", "Open", "Volume"]
+
+
+def bar_index(years: float, freq: str = "1D", start: str = "2000-01-03") -> pd.DatetimeIndex:
+    # Business days, and for intraday bars the bar-open times within each session
+    days = pd.bdate_range(start, periods=max(1, int(round(years * TRADING_DAYS))))
+    if freq == "1D":
+        return days.rename("Date")
+    step = BAR_MINUTES[freq]
+    offsets = SESSION_OPEN + pd.to_timedelta(np.arange(0, SESSION_MINUTES, step), unit="min")
+    stamps = days.to_numpy()[:, None] + offsets.to_numpy()[None, :]
+    return pd.DatetimeIndex(stamps.ravel(), name="Date")
+
+
+def synthetic_panel(tickers=6, years: float = 5, freq: str = "1D", seed: int = 0,
+                    start: str = "2000-01-03", missing: float = 0.0, staggered: bool = False) -> pd.DataFrame:
+    # Geometric Brownian motion Close per ticker, with Open/High/Low drawn
+    # around it so Low <= Open, Close <= High always holds. `missing` blanks
+    # that fraction of bars at random; `staggered` lists later tickers later,
+    # like a universe where not every symbol has the full history.
+    rng = np.random.default_rng(seed)
+    names = [f"T{i:04d}" for i in range(tickers)] if isinstance(tickers, int) else list(tickers)
+    index = bar_index(years, freq, start)
+    rows, n = len(index), len(names)
+
+    bars_per_year = TRADING_DAYS * SESSION_MINUTES / BAR_MINUTES[freq]
+    drift = rng.uniform(-0.05, 0.2, n) / bars_per_year
+    vol = rng.uniform(0.15, 0.6, n) / np.sqrt(bars_per_year)
+    steps = rng.standard_normal((rows, n)) * vol + drift - vol ** 2 / 2
+    close = rng.uniform(10, 500, n) * np.exp(np.cumsum(steps, axis=0))
+
+    gap = rng.standard_normal((rows, n)) * vol / 4
+    open_ = np.empty_like(close)
+    open_[0] = close[0] * np.exp(gap[0])
+    open_[1:] = close[:-1] * np.exp(gap[1:])
+    wick = np.abs(rng.standard_normal((2, rows, n))) * vol / 2
+    high = np.maximum(open_, close) * np.exp(wick[0])
+    low = np.minimum(open_, close) * np.exp(-wick[1])
+    volume = np.round(rng.lognormal(13, 1, (rows, n)) * BAR_MINUTES[freq] / SESSION_MINUTES)
+
+    blank = np.zeros((rows, n), dtype=bool)
+    if missing:
+        blank |= rng.random((rows, n)) < missing
+    if staggered:
+        listed = rng.integers(0, rows // 2, n) * (np.arange(n) >= n // 2)
+        blank |= np.arange(rows)[:, None] < listed[None, :]
+
+    columns = pd.MultiIndex.from_product([PRICES, names], names=["Price", "Ticker"])
+    values = np.concatenate([close, high, low, open_, volume], axis=1)
+    values[np.tile(blank, len(PRICES))] = np.nan
+    return pd.DataFrame(values, index=index, columns=columns)
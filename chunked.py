@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+
+from histograms import NBINS, bin_counts, bin_edges, moment_frame
+from indicators import WINDOW, compute_indicators
+from instrumentation import instrumented
+from snapshot import SnapshotReader, SnapshotStore
+
+# Out-of-core analysis of a snapshot (see snapshot.py) that is too large to
+# load: the panel is streamed through memory in blocks of whole ticker
+# columns ("tickers") or of rows across every ticker ("time"), and the
+# per-block results are merged into exactly what the in-memory functions
+# give. Rolling calculations in time blocks re-read the `window` rows before
+# each block, so no window is cut.
+#
+#   reader = SnapshotStore("snapshots").reader("data")
+#   stats = chunked_statistics(reader, mode="time", budget=1 << 30)
+#   indicators = chunked_indicators(reader, SnapshotStore("out"), "indicators")
+
+MODES = ("tickers", "time")
+# Working memory one block may use, in bytes
+MEMORY_BUDGET = 512 * 2 ** 20
+# float64 copies of a block alive at once while it is processed (the block,
+# its returns, rolling sums and the results written back)
+WORKING_COPIES = 8
+INDICATORS = ("rolling_mean", "rolling_std", "daily_return", "volatility")
+
+
+def block_ranges(n_rows: int, n_columns: int, mode: str = "tickers", budget: int = MEMORY_BUDGET,
+                 overlap: int = 0) -> list:
+    # (row start, row stop, column start, column stop) blocks covering the
+    # panel, each within `budget`. Time blocks hold at least `overlap` + 1
+    # rows, so that after the overlap there is always a row to keep.
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, not {mode!r}")
+    cell_bytes = 8 * WORKING_COPIES
+    if mode == "tickers":
+        width = max(1, budget // max(1, cell_bytes * n_rows))
+        return [(0, n_rows, c, min(n_columns, c + width)) for c in range(0, n_columns, width)]
+    height = max(1, budget // max(1, cell_bytes * n_columns) - overlap)
+    return [(r, min(n_rows, r + height), 0, n_columns) for r in range(0, n_rows, height)]
+
+
+def iter_blocks(reader: SnapshotReader, positions: list, mode: str = "tickers", budget: int = MEMORY_BUDGET,
+                overlap: int = 0):
+    # Yields (row start, column start, values, lead): values are the block's
+    # rows plus up to `overlap` rows before them, `lead` how many of those
+    # leading rows belong to the previous block
+    for start, stop, first, last in block_ranges(len(reader), len(positions), mode, budget, overlap):
+        lead = min(start, overlap)
+        yield start, first, reader.read(positions[first:last], start - lead, stop), lead
+
+
+def _returns(values: np.ndarray) -> np.ndarray:
+    # Simple returns down the rows, like DataFrame.pct_change(); the first row is NaN
+    returns = np.full(values.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = values[1:] / values[:-1] - 1
+    return returns
+
+
+class MomentAccumulator:
+    # Count, mean, central moment sums M2..M4, min and max per column,
+    # merged block by block with the pairwise update formulas (Chan et al.,
+    # Pebay), so the result matches a single pass over all rows up to
+    # rounding. Gaps (NaN) are skipped.
+    def __init__(self, n_columns: int):
+        self.n = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.m3 = np.zeros(n_columns)
+        self.m4 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+
+    def update(self, values: np.ndarray, columns: slice = slice(None)):
+        # Merge a (rows x columns) block into the given column range
+        valid = ~np.isnan(values)
+        nb = valid.sum(axis=0).astype(float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mb = np.where(nb > 0, np.where(valid, values, 0.0).sum(axis=0) / nb, 0.0)
+            dev = np.where(valid, values - mb, 0.0)
+        # Products rather than ** 3 / ** 4, which numpy evaluates with pow()
+        square = dev * dev
+        m2b, m3b, m4b = square.sum(axis=0), (square * dev).sum(axis=0), (square * square).sum(axis=0)
+        if len(values):
+            np.minimum(self.min[columns], np.where(valid, values, np.inf).min(axis=0), out=self.min[columns])
+            np.maximum(self.max[columns], np.where(valid, values, -np.inf).max(axis=0), out=self.max[columns])
+
+        # A copy: the first-block check below reads the counts after self.n is updated
+        na, ma = self.n[columns].copy(), self.mean[columns]
+        m2a, m3a, m4a = self.m2[columns], self.m3[columns], self.m4[columns]
+        n = na + nb
+        safe = np.maximum(n, 1)
+        d = mb - ma
+        self.mean[columns] = ma + d * nb / safe
+        self.m4[columns] = (m4a + m4b + d ** 4 * na * nb * (na * na - na * nb + nb * nb) / safe ** 3
+                            + 6 * d * d * (na * na * m2b + nb * nb * m2a) / safe ** 2
+                            + 4 * d * (na * m3b - nb * m3a) / safe)
+        self.m3[columns] = (m3a + m3b + d ** 3 * na * nb * (na - nb) / safe ** 2
+                            + 3 * d * (na * m2b - nb * m2a) / safe)
+        self.m2[columns] = m2a + m2b + d * d * na * nb / safe
+        self.n[columns] = n
+        # A column's first block is taken as is, so one block is exactly one pass
+        first = na == 0
+        for total, block in ((self.mean, mb), (self.m2, m2b), (self.m3, m3b), (self.m4, m4b)):
+            total[columns] = np.where(first, block, total[columns])
+
+    def frame(self, index: pd.Index) -> pd.DataFrame:
+        # Same table as histograms.moments() over the whole column
+        n = self.n.astype(np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(n > 0, self.mean, np.nan)
+            return moment_frame(n, mean, self.m2 / n, self.m3 / n, self.m4 / n, index)
+
+
+@instrumented
+def chunked_statistics(reader: SnapshotReader, field: str = "Close", nbins: int = NBINS, mode: str = "tickers",
+                       budget: int = MEMORY_BUDGET) -> dict:
+    # Moments and histograms of one price field and of its returns for every
+    # ticker, in two streaming passes: the first merges moments (and the
+    # min/max the bins span), the second adds up bin counts on those fixed
+    # edges. Matches histograms.moments / histogram_matrix on the loaded panel.
+    positions = reader.field(field)
+    tickers = pd.Index([col[-1] if isinstance(col, tuple) else col for col in reader.columns[positions]],
+                       name="Ticker")
+    overlap = 1 if mode == "time" else 0  # each block's first return needs the previous price
+    prices, returns = MomentAccumulator(len(positions)), MomentAccumulator(len(positions))
+    for _, first, values, lead in iter_blocks(reader, positions, mode, budget, overlap):
+        columns = slice(first, first + values.shape[1])
+        prices.update(values[lead:], columns)
+        returns.update(_returns(values)[lead:], columns)
+
+    price_edges = bin_edges(prices.min, prices.max, nbins)
+    return_edges = bin_edges(returns.min, returns.max, nbins)
+    price_counts = np.zeros((len(positions), nbins), dtype=np.int64)
+    return_counts = np.zeros((len(positions), nbins), dtype=np.int64)
+    for _, first, values, lead in iter_blocks(reader, positions, mode, budget, overlap):
+        columns = slice(first, first + values.shape[1])
+        price_counts[columns] += bin_counts(values[lead:], price_edges[columns])
+        return_counts[columns] += bin_counts(_returns(values)[lead:], return_edges[columns])
+
+    return {
+        "price_moments": prices.frame(tickers),
+        "return_moments": returns.frame(tickers),
+        "price_histogram": (price_edges, price_counts),
+        "return_histogram": (return_edges, return_counts),
+    }
+
+
+@instrumented
+def chunked_indicators(reader: SnapshotReader, store: SnapshotStore, name: str = "indicators",
+                       window: int = WINDOW, field: str = "Close", mode: str = "tickers",
+                       budget: int = MEMORY_BUDGET) -> pd.DataFrame:
+    # indicators.compute_indicators over the whole panel, block by block,
+    # written to snapshot `name` in `store` with (Indicator, Ticker) columns
+    # instead of being held in memory; returns the memory-mapped result.
+    # Ticker blocks give identical values; time blocks restart pandas'
+    # running window sums at each block, which differs only by rounding.
+    positions = reader.field(field)
+    tickers = [col[-1] if isinstance(col, tuple) else col for col in reader.columns[positions]]
+    columns = pd.MultiIndex.from_product([INDICATORS, tickers], names=["Indicator", "Ticker"])
+    # A volatility window reaches back `window` returns, one price more than the rolling mean
+    overlap = window if mode == "time" else 0
+    n = len(tickers)
+    with store.writer(name, reader.index, columns) as writer:
+        for start, first, values, lead in iter_blocks(reader, positions, mode, budget, overlap):
+            indicators = compute_indicators(pd.DataFrame(values), window)
+            for i, metric in enumerate(INDICATORS):
+                part = getattr(indicators, metric).to_numpy()[lead:]
+                writer.write(part, start, slice(i * n + first, i * n + first + values.shape[1]))
+    return store.open(name)
+
+
+def histogram_table(edges: np.ndarray, counts: np.ndarray, tickers: pd.Index) -> pd.DataFrame:
+    # Long (Ticker, bin) table of a histogram, for writing out
+    nbins = counts.shape[1]
+    return pd.DataFrame({
+        "Ticker": np.repeat(np.asarray(tickers, dtype=object), nbins),
+        "bin_left": edges[:, :-1].ravel(),
+        "bin_right": edges[:, 1:].ravel(),
+        "count": counts.ravel(),
+    })
@@ -0,0 +1,108 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from price_cache import FetchError, YFinanceFetcher, split_by_ticker, to_panel
+
+MAX_WORKERS = 8
+RATE_PER_SECOND = 4.0
+BURST = 8
+RETRIES = 3
+BACKOFF_SECONDS = 0.5
+
+
+class TokenBucket:
+    # Thread-safe token bucket: allows `burst` calls at once, then `rate` per second
+    def __init__(self, rate: float = RATE_PER_SECOND, burst: int = BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self._sleep(wait)
+
+
+@dataclass
+class TickerStatus:
+    ticker: str
+    state: str = "pending"  # pending / ok / empty / failed
+    attempts: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    error: str = None
+
+
+class ConcurrentFetcher:
+    # Fetches one ticker per task on a bounded thread pool, behind a shared
+    # rate limiter, retrying failures with exponential backoff. It has the
+    # same fetch() signature as YFinanceFetcher, so it can sit between
+    # PriceCache and any single-call data source (including a local fake).
+    # A failing symbol is reported in its status and does not fail the
+    # whole batch: once every ticker is done, FetchError carries the panel of
+    # the ones that arrived plus the failed list, so the cache never records
+    # a failed ticker's range as covered.
+    def __init__(self, fetcher=None, max_workers: int = MAX_WORKERS, rate: float = RATE_PER_SECOND,
+                 burst: int = BURST, retries: int = RETRIES, backoff: float = BACKOFF_SECONDS, sleep=time.sleep):
+        self.fetcher = fetcher if fetcher is not None else YFinanceFetcher()
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self._sleep = sleep
+        self.bucket = TokenBucket(rate, burst, sleep=sleep)
+
+    def _fetch_one(self, ticker: str, start, end) -> tuple:
+        status = TickerStatus(ticker)
+        started = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            status.attempts = attempt + 1
+            self.bucket.acquire()
+            try:
+                frame = split_by_ticker(self.fetcher.fetch([ticker], start, end), [ticker]).get(ticker)
+            except Exception as e:
+                status.error = e.errors.get(ticker, str(e)) if isinstance(e, FetchError) else str(e)
+                if attempt < self.retries:
+                    # Exponential backoff with jitter so retries do not line up
+                    self._sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+                continue
+            status.error = None
+            status.rows = 0 if frame is None else len(frame)
+            status.state = "ok" if status.rows else "empty"
+            status.seconds = time.perf_counter() - started
+            return status, frame
+        status.state = "failed"
+        status.seconds = time.perf_counter() - started
+        return status, None
+
+    def fetch(self, tickers: list, start, end, on_result=None):
+        # on_result(status, frame) is called from the calling thread as each
+        # ticker finishes, so callers can report progress as results arrive
+        frames = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(tickers)))) as executor:
+            futures = [executor.submit(self._fetch_one, ticker, start, end) for ticker in tickers]
+            for future in as_completed(futures):
+                status, frame = future.result()
+                frames[status.ticker] = frame
+                if status.state == "failed":
+                    errors[status.ticker] = status.error
+                if on_result is not None:
+                    on_result(status, frame)
+        panel = to_panel({ticker: frames.get(ticker) for ticker in tickers})
+        if errors:
+            raise FetchError(panel, [ticker for ticker in tickers if ticker in errors], errors)
+        return panel
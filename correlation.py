@@ -0,0 +1,72 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.colors import DEFAULT_PLOTLY_COLORS
+from diagnostics import dataframe, plotly_chart
+from downsample import clip_dates
+from figures import add_lines, heatmap, subplot_grid
+from instrumentation import instrumented
+from returns import (CORRELATION_WINDOW, RollingCovariance, correlation, covariance, return_matrix,
+                     rolling_average_correlation)
+
+# Longest average-correlation series drawn; longer histories are sampled
+# every few bars while the rolling state still sees every bar
+MAX_SERIES_POINTS = 1000
+
+@instrumented
+def plot_correlation(df: pd.DataFrame, tickers: list, date_range=None, window: int = CORRELATION_WINDOW):
+    st.title("📊 Correlation Analysis")
+    st.subheader(f"Cross-Ticker Correlation and Covariance of Daily Returns ({window}-Day Rolling)")
+
+    if df.empty:
+        st.warning("No data available for correlation analysis.")
+        return
+
+    # One return matrix for every loaded ticker, restricted to the chart range
+    returns = clip_dates(return_matrix(df), date_range)
+    if returns.shape[1] < 2 or len(returns) <= window:
+        st.info(f"Correlation analysis needs at least two tickers and more than {window} days of data.")
+        return
+
+    kind = st.radio("Matrix", ["Correlation", "Covariance"], horizontal=True)
+    rolling = RollingCovariance.from_returns(returns, window)
+    if kind == "Correlation":
+        static, latest = correlation(returns), rolling.correlation()
+        scale = dict(zmin=-1, zmax=1, zmid=0)
+    else:
+        static, latest = covariance(returns), rolling.covariance()
+        scale = dict(zmid=0)
+
+    labels = returns.columns.tolist()
+    last_day = returns.index[-1].date()
+    fig, _ = subplot_grid([f"{kind}, Whole Period", f"{kind}, {window} Days to {last_day}"], rows=1)
+    fig.add_trace(heatmap(static.to_numpy(), labels, **scale), row=1, col=1)
+    fig.add_trace(heatmap(latest, labels, **scale).update(showscale=False), row=1, col=2)
+    side = min(1000, max(500, 18 * len(labels)))
+    fig.update_layout(height=side // 2 + 150, width=1000, title_text=f"Daily Return {kind} Matrices", title_x=0.5)
+    fig.update_yaxes(autorange="reversed")
+    plotly_chart(fig, use_container_width=True)
+
+    st.write(f"{kind} over the last {window} days:")
+    dataframe(rolling.frame(latest))
+
+    # Average pairwise correlation through time, from the same incremental engine
+    step = max(1, -(-len(returns) // MAX_SERIES_POINTS))
+    averages = rolling_average_correlation(returns, window, step=step)
+    shown = [t.strip() for t in tickers if t.strip() in averages.columns]
+    fig = go.Figure()
+    add_lines(fig, averages.index, [(averages["Average"].to_numpy(), "All Tickers", "white")] + [
+        (averages[ticker].to_numpy(), ticker, DEFAULT_PLOTLY_COLORS[i % len(DEFAULT_PLOTLY_COLORS)])
+        for i, ticker in enumerate(shown)
+    ])
+    fig.update_layout(
+        height=400,
+        width=1000,
+        showlegend=True,
+        title_text=f"{window}-Day Average Correlation with the Other Tickers",
+        title_x=0.5,
+        xaxis_title="Date",
+        yaxis_title="Correlation",
+        legend_title_text="Ticker"
+    )
+    plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+
+MODEL = "additive"
+# None: one trading session for intraday bars, one trading year for daily bars
+PERIOD = None
+# ADF / KPSS run on at most this many recent bars; their lag searches grow
+# with the series, which is slow on long intraday histories
+MAX_TEST_BARS = 10_000
+MAX_CACHE_ENTRIES = 256
+# Below this many uncached series a process pool costs more than it saves
+MIN_PARALLEL_SERIES = 4
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Decomposition:
+    observed: pd.Series
+    trend: pd.Series
+    seasonal: pd.Series
+    resid: pd.Series
+    adf_stat: float = np.nan
+    adf_pvalue: float = np.nan
+    kpss_stat: float = np.nan
+    kpss_pvalue: float = np.nan
+    error: str = None
+    period: int = None
+
+    @property
+    def trend_strength(self) -> float:
+        # 0..1, how much of the deseasonalised variance the trend explains
+        resid = self.resid.dropna()
+        denom = (self.trend.reindex(resid.index) + resid).var()
+        return max(0.0, 1 - resid.var() / denom) if denom else np.nan
+
+    @property
+    def seasonal_strength(self) -> float:
+        resid = self.resid.dropna()
+        denom = (self.seasonal.reindex(resid.index) + resid).var()
+        return max(0.0, 1 - resid.var() / denom) if denom else np.nan
+
+
+def series_hash(series: pd.Series) -> str:
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(series, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def decompose_series(series: pd.Series, model: str = MODEL, period: int = PERIOD,
+                     tests: bool = True) -> Decomposition:
+    # Seasonal decomposition plus ADF / KPSS stationarity tests for one series.
+    # Errors are returned on the result so one bad ticker does not sink a batch.
+    from statsmodels.tsa.seasonal import seasonal_decompose
+    from statsmodels.tsa.stattools import adfuller, kpss
+    from bars import seasonal_period
+
+    series = series.dropna()
+    period = period or seasonal_period(series.index)
+    empty = pd.Series(dtype=float)
+    try:
+        result = seasonal_decompose(series, model=model, period=period)
+    except Exception as e:
+        return Decomposition(series, empty, empty, empty, error=str(e), period=period)
+
+    stats = {}
+    if tests:
+        tested = series.iloc[-MAX_TEST_BARS:]
+        with warnings.catch_warnings():
+            # KPSS warns when the statistic is outside its lookup table
+            warnings.simplefilter("ignore")
+            try:
+                adf = adfuller(tested, autolag="AIC")
+                stats["adf_stat"], stats["adf_pvalue"] = adf[0], adf[1]
+            except Exception:
+                pass
+            try:
+                kpss_result = kpss(tested, regression="c", nlags="auto")
+                stats["kpss_stat"], stats["kpss_pvalue"] = kpss_result[0], kpss_result[1]
+            except Exception:
+                pass
+    return Decomposition(series, result.trend, result.seasonal, result.resid, period=period, **stats)
+
+
+@instrumented
+def decompose_many(close: pd.DataFrame, tickers: list = None, model: str = MODEL,
+                   period: int = PERIOD, max_workers: int = None) -> dict:
+    # Decompose several tickers at once. Results are cached by
+    # (series hash, model, period); only the misses are computed, spread over
+    # a process pool when there are enough of them.
+    if tickers is None:
+        tickers = close.columns.tolist()
+    tickers = [t.strip() for t in tickers if t.strip() in close.columns]
+
+    results = {}
+    pending = {}
+    for ticker in tickers:
+        key = (series_hash(close[ticker]), model, period)
+        with _lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                results[ticker] = _cache[key]
+                continue
+        pending[ticker] = key
+
+    if pending:
+        names = list(pending)
+        series = [close[ticker] for ticker in names]
+        max_workers = max_workers or os.cpu_count() or 1
+        if len(names) < MIN_PARALLEL_SERIES or max_workers == 1:
+            computed = [decompose_series(s, model, period) for s in series]
+        else:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(names))) as executor:
+                computed = list(executor.map(
+                    decompose_series, series, [model] * len(names), [period] * len(names),
+                ))
+        with _lock:
+            for ticker, result in zip(names, computed):
+                results[ticker] = result
+                _cache[pending[ticker]] = result
+                _cache.move_to_end(pending[ticker])
+            while len(_cache) > MAX_CACHE_ENTRIES:
+                _cache.popitem(last=False)
+
+    return {ticker: results[ticker] for ticker in tickers}
+
+
+def stationarity_table(results: dict) -> pd.DataFrame:
+    rows = []
+    for ticker, result in results.items():
+        rows.append({
+            "Ticker": ticker,
+            "ADF statistic": result.adf_stat,
+            "ADF p-value": result.adf_pvalue,
+            "KPSS statistic": result.kpss_stat,
+            "KPSS p-value": result.kpss_pvalue,
+            # ADF rejects a unit root and KPSS does not reject stationarity
+            "Stationary": bool(result.adf_pvalue < 0.05 and result.kpss_pvalue >= 0.05),
+            "Error": result.error,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,102 @@
+import streamlit as st
+import pandas as pd
+from instrumentation import Recorder, active, json_lines, prometheus_text
+
+# Sidebar diagnostics: the session's Recorder lives in session_state and is
+# only created once the "Diagnostics" toggle is on, so a normal session never
+# records anything. The pages draw charts and tables through plotly_chart /
+# dataframe / line_chart below, which size the payload only when the calling
+# session is recording and then hand over to Streamlit's own elements.
+
+
+def payload_bytes(data) -> int:
+    # Roughly what goes over the websocket: plotly JSON for figures, Arrow IPC for tables
+    if hasattr(data, "to_json") and hasattr(data, "data") and hasattr(data, "layout"):
+        return len(data.to_json())
+    try:
+        from streamlit.dataframe_util import convert_anything_to_arrow_bytes
+        return len(convert_anything_to_arrow_bytes(data))
+    except Exception:
+        if isinstance(data, (pd.DataFrame, pd.Series)):
+            return int(data.memory_usage(deep=True).sum())
+        return 0
+
+
+def _record_payload(data):
+    recorder = active()
+    if recorder is not None and data is not None:
+        recorder.add_payload(payload_bytes(data))
+
+
+def plotly_chart(figure, *args, **kwargs):
+    _record_payload(figure)
+    return st.plotly_chart(figure, *args, **kwargs)
+
+
+def dataframe(data=None, *args, **kwargs):
+    _record_payload(data)
+    return st.dataframe(data, *args, **kwargs)
+
+
+def line_chart(data=None, *args, **kwargs):
+    _record_payload(data)
+    return st.line_chart(data, *args, **kwargs)
+
+
+def session_recorder() -> Recorder:
+    # The recorder for this session, or None while diagnostics are off
+    if not st.session_state.get("diagnostics"):
+        return None
+    recorder = st.session_state.get("diagnostics_recorder")
+    if recorder is None:
+        recorder = st.session_state.diagnostics_recorder = Recorder()
+    recorder.memory = st.session_state.get("diagnostics_memory", False)
+    recorder.log = st.session_state.get("diagnostics_log", False)
+    return recorder
+
+
+def diagnostics_controls() -> Recorder:
+    with st.sidebar:
+        enabled = st.toggle("Diagnostics", value=False, key="diagnostics",
+                            help="Time every section and analysis function of this session")
+        if enabled:
+            st.checkbox("Track peak memory (slower)", value=False, key="diagnostics_memory",
+                        help="Runs tracemalloc during script runs, which slows every allocation in the app")
+            st.checkbox("Log spans as JSON", value=False, key="diagnostics_log",
+                        help="Writes one structured record per span to the 'instrumentation' logger")
+    return session_recorder()
+
+
+def run_table(run) -> pd.DataFrame:
+    return pd.DataFrame([{
+        "Span": "  " * span.depth + span.name,
+        "Seconds": round(span.seconds, 4),
+        "Peak MB": None if span.peak_bytes is None else round(span.peak_bytes / 1e6, 2),
+        "Payload KB": round(span.payload_bytes / 1e3, 1),
+        "Error": span.error,
+    } for span in run.spans])
+
+
+def diagnostics_panel(recorder: Recorder):
+    # Drawn after the script body so it shows the run that just finished.
+    # Fragment reruns cannot write to the sidebar; they are listed under
+    # earlier runs on the next full rerun.
+    if recorder is None or recorder.last_run() is None:
+        return
+    runs = list(recorder.runs)
+    with st.sidebar.expander("Diagnostics", expanded=True):
+        run = runs[-1]
+        st.caption(f"Last {run.label} run: {run.seconds:.3f}s")
+        # The panel's own tables are drawn outside any run, so they are not counted
+        st.dataframe(run_table(run), hide_index=True)
+        if len(runs) > 1:
+            st.write("Earlier runs:")
+            st.dataframe(pd.DataFrame([
+                {"Run": r.label, "Started": pd.Timestamp(r.started, unit="s"), "Seconds": round(r.seconds, 4),
+                 "Payload KB": round(r.spans[0].payload_bytes / 1e3, 1) if r.spans else 0.0}
+                for r in reversed(runs[:-1])
+            ]), hide_index=True)
+        st.download_button("Export JSON lines", json_lines(runs), file_name="diagnostics.jsonl",
+                           mime="application/x-ndjson")
+        st.download_button("Export Prometheus text", prometheus_text(runs), file_name="diagnostics.prom",
+                           mime="text/plain")
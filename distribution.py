@@ -1,10 +1,37 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from diagnostics import dataframe, plotly_chart
+from figures import subplot_grid, grid_position, histogram_bars, line_trace
+from histograms import histogram_matrix, density, moments, binned_kde
+from indicators import get_indicators
+from instrumentation import instrumented
+
+@instrumented
+def plot_histograms(frame: pd.DataFrame, titles: list, x_title: str, title_text: str, kde: bool = False):
+    # Bin all columns server-side in one pass and ship only the bars
+    edges, counts = histogram_matrix(frame)
+    heights = density(edges, counts)
+    stats = moments(frame)
+    if kde:
+        centers, kde_values = binned_kde(edges, counts, stats['std'].to_numpy())
+
+    fig, height = subplot_grid(titles)
+    for i, name in enumerate(frame.columns):
+        row, col_idx = grid_position(i)
+        fig.add_trace(histogram_bars(edges[i], heights[i], str(name)), row=row, col=col_idx)
+        if kde:
+            fig.add_trace(line_trace(centers[i], kde_values[i], 'KDE', 'orange', showlegend=False), row=row, col=col_idx)
+        fig.update_xaxes(title_text=x_title, row=row, col=col_idx)
+        fig.update_yaxes(title_text="Frequency", row=row, col=col_idx)
+
+    fig.update_layout(height=height, width=1000, showlegend=False, bargap=0,
+                     title_text=title_text, title_x=0.5)
+    plotly_chart(fig, use_container_width=True)
+    st.write("Summary Moments:")
+    dataframe(stats)
 
-def check_distribution(df: pd.DataFrame):
+@instrumented
+def check_distribution(df: pd.DataFrame, tickers: list = None, kde: bool = False):
     st.title("📊 Distribution Analysis")
     st.subheader("Check the distribution of your data")
 
@@ -20,41 +47,27 @@ def check_distribution(df: pd.DataFrame):
             st.info("No 'Close' price columns available for distribution analysis.")
             return
         # Create a DataFrame with single-level columns for plotting
-        plot_df = df['Close'].copy()
+        plot_df = df['Close']
     else:
         # If single-level columns, select numeric columns
-        plot_df = df.select_dtypes(include=['float64', 'int64']).copy()
+        plot_df = df.select_dtypes(include=['float64', 'int64'])
         numeric_cols = plot_df.columns
 
-    if not numeric_cols:
+    # Only plot the tickers the user drilled into
+    if tickers is not None:
+        wanted = [t.strip() for t in tickers]
+        numeric_cols = [col for col in numeric_cols if (col[1] if isinstance(col, tuple) else col) in wanted]
+
+    if not len(numeric_cols):
         st.info("No numeric columns available for distribution analysis.")
         return
 
-    # Create a 3x2 subplot grid (max 6 tickers)
-    rows, cols = 3, 2
-    fig = make_subplots(
-        rows=rows,
-        cols=cols,
-        subplot_titles=[f"{col[1] if isinstance(col, tuple) else col} Distribution" for col in numeric_cols[:6]],
-        vertical_spacing=0.15,
-        horizontal_spacing=0.1
-    )
+    names = [col[1] if isinstance(col, tuple) else col for col in numeric_cols]
+    plot_histograms(plot_df[names], [f"{name} Distribution" for name in names],
+                    "Stock Price", "Stock Price Distributions", kde=kde)
 
-    for i, col in enumerate(numeric_cols[:6]):  # Limit to 6 for 3x2 grid
-        row = i // 2 + 1
-        col_idx = i % 2 + 1
-        col_name = col[1] if isinstance(col, tuple) else col
-        hist = px.histogram(plot_df, x=col_name, nbins=50, histnorm='probability density')
-        for trace in hist.data:
-            fig.add_trace(trace, row=row, col=col_idx)
-        fig.update_xaxes(title_text="Stock Price", row=row, col=col_idx)
-        fig.update_yaxes(title_text="Frequency", row=row, col=col_idx)
-
-    fig.update_layout(height=800, width=1000, showlegend=False, 
-                     title_text="Stock Price Distributions", title_x=0.5)
-    st.plotly_chart(fig, use_container_width=True)
-
-def distribution_for_daily_returns(df: pd.DataFrame, tickers: list):
+@instrumented
+def distribution_for_daily_returns(df: pd.DataFrame, tickers: list, kde: bool = False):
     st.title("📊 Daily Returns Distribution Analysis")
     st.subheader("Check the distribution of daily returns")
 
@@ -62,47 +75,18 @@ def distribution_for_daily_returns(df: pd.DataFrame, tickers: list):
         st.warning("No data available for daily returns analysis.")
         return
 
-    # Handle multi-level columns from yfinance
-    if isinstance(df.columns, pd.MultiIndex):
-        data_close = df['Close'].copy()
-    else:
-        data_close = df.select_dtypes(include=['float64', 'int64']).copy()
-
-    if data_close.empty:
+    # Daily returns come from the shared indicator cache
+    indicators = get_indicators(df)
+    if indicators.close.empty:
         st.info("No valid columns found for daily returns analysis.")
         return
 
-    # Calculate daily returns
-    returns_cols = []
-    for ticker in tickers:
-        ticker = ticker.strip()
-        if ticker in data_close.columns:
-            data_close[f'{ticker}_daily_return'] = data_close[ticker].pct_change()
-            returns_cols.append(f'{ticker}_daily_return')
+    returns_cols = [t.strip() for t in tickers if t.strip() in indicators.daily_return.columns]
 
     if not returns_cols:
         st.info("No valid ticker columns found for daily returns analysis.")
         return
 
-    # Create a 3x2 subplot grid for daily returns
-    rows, cols = 3, 2
-    fig = make_subplots(
-        rows=rows,
-        cols=cols,
-        subplot_titles=[f"{col.split('_')[0]} Daily Return Distribution" for col in returns_cols[:6]],
-        vertical_spacing=0.15,
-        horizontal_spacing=0.1
-    )
-
-    for i, col in enumerate(returns_cols[:6]):  # Limit to 6 for 3x2 grid
-        row = i // 2 + 1
-        col_idx = i % 2 + 1
-        hist = px.histogram(data_close, x=col, nbins=50, histnorm='probability density')
-        for trace in hist.data:
-            fig.add_trace(trace, row=row, col=col_idx)
-        fig.update_xaxes(title_text="Daily Return", row=row, col=col_idx)
-        fig.update_yaxes(title_text="Frequency", row=row, col=col_idx)
-
-    fig.update_layout(height=800, width=1000, showlegend=False,
-                     title_text="Daily Returns Distributions", title_x=0.5)
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    plot_histograms(indicators.daily_return[returns_cols],
+                    [f"{ticker} Daily Return Distribution" for ticker in returns_cols],
+                    "Daily Return", "Daily Returns Distributions", kde=kde)
\ No newline at end of file
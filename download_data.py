@@ -1,12 +1,65 @@
-import yfinance as yf
 import pandas as pd
 import streamlit as st
+from concurrent_fetch import ConcurrentFetcher, TickerStatus
+from diagnostics import dataframe
+from instrumentation import instrumented
+from price_cache import INTERVAL, PriceCache, YFinanceFetcher, interval_cache_dir
+
+_caches = {}
+# Per-ticker state shown when a ticker was fetched over several ranges
+_STATE_ORDER = ["pending", "empty", "ok", "failed"]
+
+def _worst(a: str, b: str) -> str:
+    return max(a, b, key=_STATE_ORDER.index)
+
+def get_price_cache(interval: str = INTERVAL) -> PriceCache:
+    # One on-disk cache per bar size and server process, created on first use
+    if interval not in _caches:
+        _caches[interval] = PriceCache(interval_cache_dir(interval),
+                                       fetcher=ConcurrentFetcher(YFinanceFetcher(interval)))
+    return _caches[interval]
+
+@instrumented
+def download_data(ticker: str, start_date, end_date, cache: PriceCache = None, interval: str = INTERVAL) -> pd.DataFrame:
+    from bars import clip_to_lookback
+
+    cache = cache if cache is not None else get_price_cache(interval)
+    # Yahoo only keeps recent intraday history
+    clipped = clip_to_lookback(start_date, end_date, interval)
+    if clipped > pd.Timestamp(start_date).date():
+        st.info(f"{interval} bars are only available from {clipped}; starting there.")
+        start_date = clipped
+    tickers = [ticker] if isinstance(ticker, str) else list(ticker)
+    statuses = {}
+    progress = st.progress(0.0, text="Downloading...")
+
+    def on_result(status, frame):
+        # Tickers finish in any order; report each one as it lands. A ticker
+        # missing several date ranges reports once per range, so its rows
+        # are merged, and any failed range marks the ticker failed.
+        seen = statuses.get(status.ticker)
+        if seen is not None:
+            status = TickerStatus(status.ticker, _worst(seen.state, status.state), seen.attempts + status.attempts,
+                                  seen.rows + status.rows, seen.seconds + status.seconds, status.error or seen.error)
+        statuses[status.ticker] = status
+        progress.progress(min(1.0, len(statuses) / len(tickers)), text=f"{status.ticker}: {status.state}")
 
-def download_data(ticker: str, start_date, end_date) -> pd.DataFrame:
     try:
-        df = yf.download(ticker, start=start_date, end=end_date)
-        st.success("Data Downloaded Successfully")
+        df = cache.get(tickers, start_date, end_date, on_result=on_result)
+        progress.empty()
+        failed = [s.ticker for s in statuses.values() if s.state == "failed"]
+        if failed:
+            st.warning(f"Could not download: {', '.join(failed)}. Showing the tickers that succeeded.")
+        else:
+            st.success("Data Downloaded Successfully")
+        if cache.last_fetches:
+            st.caption(f"Fetched {len(cache.last_fetches)} missing date range(s); the rest was served from the local cache.")
+        else:
+            st.caption("Served entirely from the local cache.")
+        if statuses:
+            dataframe(pd.DataFrame([vars(s) for s in statuses.values()]))
         return df
     except Exception as e:
+        progress.empty()
         st.error(f"Error downloading data: {e}")
-        return pd.DataFrame()  # Return empty DataFrame on error
\ No newline at end of file
+        return pd.DataFrame()  # Return empty DataFrame on error
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Charts are 1000px wide: one min and one max per pixel column is all the
+# browser can show, so that is the most points a trace ever needs
+MAX_POINTS = 2000
+
+
+def minmax_indices(y: np.ndarray, n_out: int = MAX_POINTS) -> np.ndarray:
+    # Keep the min and max of each of n_out / 2 equal buckets (fully vectorized)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    n_buckets = max(1, n_out // 2)
+    bucket_len = -(-n // n_buckets)
+    padded = np.full(n_buckets * bucket_len, np.nan)
+    padded[:n] = y
+    block = padded.reshape(n_buckets, bucket_len)
+    missing = np.isnan(block)
+    arg_min = np.where(missing, np.inf, block).argmin(axis=1)
+    arg_max = np.where(missing, -np.inf, block).argmax(axis=1)
+    offsets = np.arange(n_buckets) * bucket_len
+    idx = np.concatenate([offsets + arg_min, offsets + arg_max, [0, n - 1]])
+    return np.unique(idx[idx < n])
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int = MAX_POINTS) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets: keeps the visual shape better than
+    # min/max but needs one (vectorized) step per output point
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) <= n_out:
+        return valid
+    x, y = x[valid], y[valid]
+    n = len(valid)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_start, next_stop = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        next_stop = max(next_stop, next_start + 1)
+        avg_x = x[next_start:next_stop].mean()
+        avg_y = y[next_start:next_stop].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:stop] - y[a])
+            - (x[a] - x[start:stop]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return valid[np.unique(selected)]
+
+
+def downsample_indices(columns: list, n_out: int = MAX_POINTS, method: str = "minmax") -> np.ndarray:
+    # Rows kept for any column survive for all columns, so traces that share
+    # an x-axis stay aligned; at most n_out rows are kept per column
+    n = len(columns[0]) if columns else 0
+    if n <= n_out:
+        return np.arange(n)
+    keep = []
+    x = np.arange(n, dtype=float)
+    for values in columns:
+        values = np.asarray(values, dtype=float)
+        if method == "lttb":
+            keep.append(lttb_indices(x, values, n_out))
+        else:
+            keep.append(minmax_indices(values, n_out))
+    return np.unique(np.concatenate(keep))
+
+
+def downsample_frame(df: pd.DataFrame, n_out: int = MAX_POINTS, method: str = "minmax") -> pd.DataFrame:
+    if len(df) <= n_out:
+        return df
+    columns = [pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float) for col in df.columns]
+    return df.iloc[downsample_indices(columns, n_out, method)] if columns else df
+
+
+def date_mask(index: pd.Index, date_range=None) -> np.ndarray:
+    if date_range is None:
+        return np.ones(len(index), dtype=bool)
+    start, end = pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1])
+    if not isinstance(date_range[1], datetime):
+        # A plain date means "up to and including that whole day"
+        end = end + pd.Timedelta(days=1)
+    return np.asarray((index >= start) & (index < end))
+
+
+def clip_dates(df, date_range=None):
+    # Restrict to the zoomed-in window; downsampling afterwards means a
+    # narrower window is drawn at higher (eventually full) resolution
+    if date_range is None:
+        return df
+    return df[date_mask(df.index, date_range)]
@@ -0,0 +1,106 @@
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from downsample import MAX_POINTS, date_mask, downsample_indices
+
+GRID_COLS = 2
+ROW_HEIGHT = 800 // 3
+
+
+def subplot_grid(titles: list, cols: int = GRID_COLS, rows: int = None, vertical_spacing: float = None):
+    # Two-column grid with as many rows as needed; spacing shrinks with the
+    # row count because plotly caps it at 1 / (rows - 1)
+    rows = rows or max(1, -(-len(titles) // cols))
+    fig = make_subplots(
+        rows=rows,
+        cols=cols,
+        subplot_titles=titles,
+        vertical_spacing=vertical_spacing if vertical_spacing is not None else min(0.15, 0.5 / rows),
+        horizontal_spacing=0.1
+    )
+    return fig, max(400, ROW_HEIGHT * rows)
+
+
+def grid_position(i: int, cols: int = GRID_COLS) -> tuple:
+    return i // cols + 1, i % cols + 1
+
+
+def line_trace(x, y, name: str, color: str, dash: str = None, showlegend: bool = True) -> go.Scatter:
+    return go.Scatter(
+        x=x,
+        y=y,
+        mode="lines",
+        name=name,
+        legendgroup=name,
+        showlegend=showlegend,
+        line=dict(color=color, dash=dash),
+    )
+
+
+def add_lines(fig: go.Figure, index, lines: list, row: int = None, col: int = None,
+              date_range=None, n_out: int = MAX_POINTS, showlegend: bool = True):
+    # lines: (values, name, color[, dash]) tuples sharing one date index.
+    # Traces are built straight from NumPy arrays: the shared index is
+    # clipped to the zoom window and thinned once for all of them.
+    mask = date_mask(index, date_range)
+    x = np.asarray(index)[mask]
+    ys = [np.asarray(line[0], dtype=float)[mask] for line in lines]
+    keep = downsample_indices(ys, n_out)
+    x = x[keep]
+    for line, y in zip(lines, ys):
+        name, color = line[1], line[2]
+        dash = line[3] if len(line) > 3 else None
+        trace = line_trace(x, y[keep], name, color, dash=dash, showlegend=showlegend)
+        if row is None:
+            fig.add_trace(trace)
+        else:
+            fig.add_trace(trace, row=row, col=col)
+
+
+
+def add_forecast(fig: go.Figure, index, mean, lower, upper, color: str = "orange",
+                 row: int = None, col: int = None, showlegend: bool = True):
+    # Forecast mean as a dashed line over a shaded prediction interval
+    x = np.asarray(index)
+    traces = [
+        go.Scatter(x=x, y=upper, mode="lines", line=dict(width=0), hoverinfo="skip",
+                   legendgroup="Forecast", showlegend=False),
+        go.Scatter(x=x, y=lower, mode="lines", line=dict(width=0), fill="tonexty",
+                   fillcolor="rgba(255, 165, 0, 0.2)", name="Forecast Interval",
+                   legendgroup="Forecast", showlegend=showlegend),
+        line_trace(x, mean, "Forecast", color, dash="dash", showlegend=showlegend),
+    ]
+    for trace in traces:
+        if row is None:
+            fig.add_trace(trace)
+        else:
+            fig.add_trace(trace, row=row, col=col)
+
+
+def heatmap(matrix, labels: list, zmin: float = None, zmax: float = None, zmid: float = None) -> go.Heatmap:
+    # Square ticker x ticker matrix, diverging colours centred on zmid
+    labels = [str(label) for label in labels]
+    return go.Heatmap(
+        z=np.asarray(matrix, dtype=float),
+        x=labels,
+        y=labels,
+        zmin=zmin,
+        zmax=zmax,
+        zmid=zmid,
+        colorscale="RdBu",
+        reversescale=True,
+    )
+
+
+def histogram_bars(edges, heights, name: str, color: str = None) -> go.Bar:
+    # Pre-binned histogram: only nbins bars go to the browser, not the samples
+    edges = np.asarray(edges, dtype=float)
+    return go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=heights,
+        width=np.diff(edges),
+        name=name,
+        marker=dict(color=color),
+        showlegend=False,
+    )
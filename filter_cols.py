@@ -1,10 +1,15 @@
 import streamlit as st
 import pandas as pd
+from analytics import select_columns, summarize
+from diagnostics import dataframe, line_chart
+from downsample import clip_dates, downsample_frame
+from instrumentation import instrumented
 
+@instrumented
 def filter_columns(df: pd.DataFrame, cols: list) -> pd.DataFrame:
     try:
         # Only keep specified columns that exist in the DataFrame
-        df = df[[col for col in cols if col in df.columns]]
+        df = select_columns(df, cols)
         st.success("Columns Filtered Successfully")
         return df
     except Exception as e:
@@ -12,14 +17,19 @@ def filter_columns(df: pd.DataFrame, cols: list) -> pd.DataFrame:
         return df
     
 
-def create_line_chart(df: pd.DataFrame):
+@instrumented
+def create_line_chart(df: pd.DataFrame, date_range=None):
     st.subheader("Line Chart")
-    st.line_chart(df['Close'], use_container_width=True)
+    # Send at most a screen-width's worth of points per series to the browser
+    line_chart(downsample_frame(clip_dates(df['Close'], date_range)), use_container_width=True)
 
-def describe_data(df: pd.DataFrame):
+@instrumented
+def describe_data(df: pd.DataFrame, summary: dict = None):
+    # Pass a precomputed summary to skip the describe()/isnull() work
+    summary = summary if summary is not None else summarize(df)
     st.subheader("Data Description")
-    st.write("Data Shape:", df.shape)
-    st.write("Data Types:", df.dtypes)
-    st.write("Missing Values:", df.isnull().sum())
+    st.write("Data Shape:", summary["shape"])
+    st.write("Data Types:", summary["dtypes"])
+    st.write("Missing Values:", summary["missing"])
     st.write("Statistical Summary:")
-    st.dataframe(df.describe())
\ No newline at end of file
+    dataframe(summary["describe"])
\ No newline at end of file
@@ -0,0 +1,273 @@
+import os
+import pickle
+import signal
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from bars import bar_spacing
+from indicators import close_prices
+from instrumentation import instrumented
+
+MODEL_DIR = ".cache/models"
+HORIZON = 30
+ALPHA = 0.05
+# Seconds a single auto_arima search may take before the ticker is skipped
+FIT_TIMEOUT = 120
+# Fresh fits use the most recent bars only; updates then append to them
+TRAIN_BARS = 1000
+# Stored models kept per ticker (older training-end dates are pruned)
+KEEP_MODELS = 2
+
+
+@dataclass(frozen=True)
+class Forecast:
+    ticker: str
+    index: pd.DatetimeIndex
+    mean: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    trained_through: pd.Timestamp = None
+    order: tuple = None
+    source: str = "failed"  # cached / updated / fitted / failed
+    seconds: float = 0.0
+    error: str = None
+    alpha: float = ALPHA
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"mean": self.mean, "lower": self.lower, "upper": self.upper}, index=self.index)
+
+
+def _failed(ticker: str, error: str, started: float) -> Forecast:
+    empty = np.array([])
+    return Forecast(ticker, pd.DatetimeIndex([]), empty, empty, empty,
+                    seconds=time.perf_counter() - started, error=error)
+
+
+def future_index(index: pd.DatetimeIndex, horizon: int) -> pd.DatetimeIndex:
+    # Business days after daily bars, otherwise the typical bar spacing
+    step = pd.Series(index[-min(len(index), 50):]).diff().median()
+    if pd.isna(step) or step >= pd.Timedelta(hours=20):
+        return pd.bdate_range(index[-1] + pd.Timedelta(days=1), periods=horizon, name=index.name)
+    return pd.date_range(index[-1], periods=horizon + 1, freq=step, name=index.name)[1:]
+
+
+def bar_size(index: pd.DatetimeIndex) -> str:
+    # The series' bar size in yfinance's notation ("1d", "1h", "5m"), from
+    # the typical spacing of its recent bars; models are stored per bar size
+    step = bar_spacing(index)
+    if pd.isna(step) or step >= pd.Timedelta(hours=20):
+        days = 1 if pd.isna(step) else max(1, round(step / pd.Timedelta(days=1)))
+        return f"{days}d"
+    minutes = max(1, round(step / pd.Timedelta(minutes=1)))
+    return f"{minutes // 60}h" if minutes % 60 == 0 else f"{minutes}m"
+
+
+class ModelStore:
+    # Fitted models on disk, one pickle per (ticker, bar size, training-end
+    # timestamp), so daily and intraday models of a symbol never mix. Each
+    # file also records the last training value, so an update is only
+    # attempted when the stored history still agrees with the new data.
+    def __init__(self, root: str = MODEL_DIR):
+        self.root = root
+
+    def _dir(self, ticker: str, size: str) -> str:
+        return os.path.join(self.root, ticker, size)
+
+    @staticmethod
+    def _stamp(ts: pd.Timestamp) -> str:
+        return pd.Timestamp(ts).strftime("%Y-%m-%dT%H%M%S")
+
+    def _stamps(self, ticker: str, size: str, until: pd.Timestamp) -> list:
+        try:
+            names = os.listdir(self._dir(ticker, size))
+        except FileNotFoundError:
+            return []
+        stamps = sorted(name[:-4] for name in names if name.endswith(".pkl"))
+        return [stamp for stamp in stamps if stamp <= self._stamp(until)]
+
+    def has(self, ticker: str, size: str, until: pd.Timestamp) -> bool:
+        return bool(self._stamps(ticker, size, until))
+
+    def latest(self, ticker: str, size: str, until: pd.Timestamp) -> dict:
+        # Newest model trained on data up to `until` (inclusive), or None
+        for stamp in reversed(self._stamps(ticker, size, until)):
+            try:
+                with open(os.path.join(self._dir(ticker, size), f"{stamp}.pkl"), "rb") as f:
+                    return pickle.load(f)
+            except Exception:
+                continue  # unreadable (e.g. half-written or from another version)
+        return None
+
+    def save(self, ticker: str, size: str, entry: dict):
+        directory = self._dir(ticker, size)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self._stamp(entry['trained_through'])}.pkl")
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        stamps = sorted(name for name in os.listdir(directory) if name.endswith(".pkl"))
+        for name in stamps[:-KEEP_MODELS]:
+            os.remove(os.path.join(directory, name))
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise _Timeout()
+
+
+def fit_model(values: np.ndarray, timeout: float = FIT_TIMEOUT):
+    # Stepwise non-seasonal auto_arima. The timeout is enforced with an alarm
+    # signal, which needs the main thread of a process with SIGALRM (i.e. a
+    # worker process on Unix); elsewhere the caller's deadline applies.
+    import pmdarima as pm
+
+    use_alarm = timeout and hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return pm.auto_arima(values, seasonal=False, stepwise=True, suppress_warnings=True,
+                                 error_action="ignore")
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def forecast_series(ticker: str, series: pd.Series, root: str = MODEL_DIR, horizon: int = HORIZON,
+                    alpha: float = ALPHA, timeout: float = FIT_TIMEOUT, fit: bool = True) -> Forecast:
+    # Forecast one Close series, reusing the stored model where possible:
+    # same training end -> predict only; older end with matching history ->
+    # update with the new bars; otherwise fit from scratch (unless fit=False).
+    # Errors come back on the result so one ticker cannot sink a batch.
+    started = time.perf_counter()
+    series = series.dropna()
+    if len(series) < 30:
+        return _failed(ticker, "not enough observations to fit a model", started)
+    end = series.index[-1]
+    size = bar_size(series.index)
+    store = ModelStore(root)
+    entry = store.latest(ticker, size, end)
+
+    try:
+        source = "cached"
+        if entry is not None:
+            trained_through = entry["trained_through"]
+            known = series.get(trained_through)
+            if known is None or not np.isclose(known, entry["last_value"]):
+                entry = None  # history was revised; the stored model no longer applies
+            elif trained_through != end:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    entry["model"].update(series[series.index > trained_through].to_numpy())
+                source = "updated"
+        if entry is None:
+            if not fit:
+                return _failed(ticker, "no reusable model", started)
+            model = fit_model(series.iloc[-TRAIN_BARS:].to_numpy(), timeout)
+            entry = {"model": model}
+            source = "fitted"
+        if source != "cached":
+            entry.update(trained_through=end, last_value=float(series.iloc[-1]))
+            store.save(ticker, size, entry)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            mean, interval = entry["model"].predict(n_periods=horizon, return_conf_int=True, alpha=alpha)
+    except _Timeout:
+        return _failed(ticker, f"model fit exceeded {timeout}s", started)
+    except Exception as e:
+        return _failed(ticker, str(e), started)
+
+    return Forecast(
+        ticker=ticker,
+        index=future_index(series.index, horizon),
+        mean=np.asarray(mean, dtype=float),
+        lower=np.asarray(interval[:, 0], dtype=float),
+        upper=np.asarray(interval[:, 1], dtype=float),
+        trained_through=end,
+        order=tuple(entry["model"].order),
+        source=source,
+        seconds=time.perf_counter() - started,
+        alpha=alpha,
+    )
+
+
+@instrumented
+def forecast_many(df: pd.DataFrame, tickers: list = None, root: str = MODEL_DIR, horizon: int = HORIZON,
+                  alpha: float = ALPHA, timeout: float = FIT_TIMEOUT, max_workers: int = None) -> dict:
+    # Tickers with a stored model are answered inline (predict or update is
+    # cheap); the ones needing a fresh auto_arima search are fitted in a
+    # process pool, where each fit is bounded by `timeout`.
+    close = close_prices(df)
+    if tickers is None:
+        tickers = close.columns.tolist()
+    tickers = [t.strip() for t in tickers if t.strip() in close.columns]
+
+    results = {}
+    to_fit = []
+    store = ModelStore(root)
+    for ticker in tickers:
+        series = close[ticker].dropna()
+        if len(series) and store.has(ticker, bar_size(series.index), series.index[-1]):
+            results[ticker] = forecast_series(ticker, series, root, horizon, alpha, timeout, fit=False)
+            if results[ticker].error is None:
+                continue
+        to_fit.append(ticker)
+
+    if to_fit:
+        max_workers = min(max_workers or os.cpu_count() or 1, len(to_fit))
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        futures = {
+            executor.submit(forecast_series, ticker, close[ticker], root, horizon, alpha, timeout): ticker
+            for ticker in to_fit
+        }
+        # Backstop for platforms without SIGALRM, or a fit stuck in C code
+        # the alarm cannot interrupt: give every wave of workers the fit
+        # timeout plus some slack, then give up on what is left
+        deadline = (timeout + 30) * -(-len(to_fit) // max_workers) if timeout else None
+        done, not_done = wait(futures, timeout=deadline)
+        for future in done:
+            results[futures[future]] = future.result()
+        for future in not_done:
+            results[futures[future]] = _failed(futures[future], f"model fit exceeded {timeout}s", time.perf_counter())
+        if not_done:
+            # Fits still running would otherwise carry on in the background
+            for process in list((getattr(executor, "_processes", None) or {}).values()):
+                process.terminate()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return {ticker: results[ticker] for ticker in tickers}
+
+
+def forecast_table(forecasts: dict) -> pd.DataFrame:
+    # Long format: one row per ticker and forecast date
+    frames = []
+    for ticker, forecast in forecasts.items():
+        if forecast.error is None:
+            frame = forecast.frame().rename_axis("Date").reset_index()
+            frame.insert(0, "Ticker", ticker)
+            frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def forecast_status(forecasts: dict) -> pd.DataFrame:
+    return pd.DataFrame([{
+        "Ticker": ticker,
+        "Order": forecast.order,
+        "Trained Through": forecast.trained_through,
+        "Source": forecast.source,
+        "Seconds": forecast.seconds,
+        "Error": forecast.error,
+    } for ticker, forecast in forecasts.items()])
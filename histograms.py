@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+
+NBINS = 50
+
+
+@instrumented
+def histogram_matrix(frame: pd.DataFrame, nbins: int = NBINS) -> tuple:
+    # Bin every column at once. Each column gets nbins equal-width bins over
+    # its own [min, max]; NaNs are ignored. Returns (edges, counts) with
+    # shapes (n_cols, nbins + 1) and (n_cols, nbins).
+    values = frame.to_numpy(dtype=float)
+    n_cols = values.shape[1]
+    valid = ~np.isnan(values)
+    if len(values):
+        lo = np.where(valid, values, np.inf).min(axis=0)
+        hi = np.where(valid, values, -np.inf).max(axis=0)
+    else:
+        lo, hi = np.full(n_cols, np.inf), np.full(n_cols, -np.inf)
+    edges = bin_edges(lo, hi, nbins)
+    return edges, bin_counts(values, edges)
+
+
+def bin_edges(lo: np.ndarray, hi: np.ndarray, nbins: int = NBINS) -> np.ndarray:
+    # nbins equal-width bins per column over [lo, hi]; a column with no data
+    # (lo = inf) gets [0, 1] and a constant column a unit-width range
+    has_data = lo <= hi
+    lo = np.where(has_data, lo, 0.0)
+    hi = np.where(has_data, hi, 1.0)
+    width = np.where(hi > lo, (hi - lo) / nbins, 1.0 / nbins)
+    return lo[:, None] + width[:, None] * np.arange(nbins + 1)
+
+
+def bin_counts(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    # (n_cols, nbins) counts of a (rows x n_cols) array on fixed edges; counts
+    # of row blocks add up to the counts of the whole array
+    n_cols, nbins = edges.shape[0], edges.shape[1] - 1
+    lo, width = edges[:, 0], edges[:, 1] - edges[:, 0]
+    rows, cols = np.nonzero(~np.isnan(values))
+    bins = np.floor((values[rows, cols] - lo[cols]) / width[cols]).astype(np.int64)
+    bins = np.clip(bins, 0, nbins - 1)
+    return np.bincount(cols * nbins + bins, minlength=n_cols * nbins).reshape(n_cols, nbins)
+
+
+def density(edges: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    # Same normalisation as histnorm='probability density'
+    widths = np.diff(edges, axis=1)
+    totals = counts.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(totals > 0, counts / (totals * widths), 0.0)
+
+
+@instrumented
+def moments(frame: pd.DataFrame) -> pd.DataFrame:
+    # Vectorized summary moments per column. Skew and kurtosis are the biased
+    # (population) estimates the Jarque-Bera statistic is defined on; kurtosis
+    # is excess kurtosis. With 2 degrees of freedom the chi-squared p-value is
+    # simply exp(-JB / 2).
+    values = frame.to_numpy(dtype=float)
+    n = (~np.isnan(values)).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.nansum(values, axis=0) / n
+        dev = values - mean
+        m2 = np.nansum(dev ** 2, axis=0) / n
+        m3 = np.nansum(dev ** 3, axis=0) / n
+        m4 = np.nansum(dev ** 4, axis=0) / n
+    return moment_frame(n, mean, m2, m3, m4, frame.columns)
+
+
+def moment_frame(n: np.ndarray, mean: np.ndarray, m2: np.ndarray, m3: np.ndarray, m4: np.ndarray,
+                 index: pd.Index) -> pd.DataFrame:
+    # The moments() table from counts, means and central moments m2..m4
+    with np.errstate(divide="ignore", invalid="ignore"):
+        skew = m3 / m2 ** 1.5
+        kurtosis = m4 / m2 ** 2 - 3
+        jb = n / 6 * (skew ** 2 + kurtosis ** 2 / 4)
+        std = np.sqrt(m2 * n / (n - 1))
+    return pd.DataFrame({
+        "count": n,
+        "mean": mean,
+        "std": std,
+        "skew": skew,
+        "kurtosis": kurtosis,
+        "jarque_bera": jb,
+        "jb_pvalue": np.exp(-jb / 2),
+    }, index=index)
+
+
+def binned_kde(edges: np.ndarray, counts: np.ndarray, std: np.ndarray = None) -> tuple:
+    # Gaussian KDE evaluated at the bin centres, computed from the bin counts
+    # instead of the raw samples. Bandwidth follows Silverman's rule.
+    centers = (edges[:, :-1] + edges[:, 1:]) / 2
+    totals = counts.sum(axis=1)
+    if std is None:
+        mean = (centers * counts).sum(axis=1) / np.maximum(totals, 1)
+        std = np.sqrt((counts * (centers - mean[:, None]) ** 2).sum(axis=1) / np.maximum(totals - 1, 1))
+    bandwidth = 1.06 * np.asarray(std, dtype=float) * np.maximum(totals, 1) ** -0.2
+    # Never narrower than one bin, or the curve just traces the bars
+    bandwidth = np.maximum(np.nan_to_num(bandwidth), np.diff(edges, axis=1)[:, 0])
+
+    # (column, evaluation point, bin) kernel weights
+    z = (centers[:, :, None] - centers[:, None, :]) / bandwidth[:, None, None]
+    kernel = np.exp(-0.5 * z ** 2) / np.sqrt(2 * np.pi)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kde = (kernel * counts[:, None, :]).sum(axis=2) / (np.maximum(totals, 1) * bandwidth)[:, None]
+    return centers, kde
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import pandas as pd
+
+from instrumentation import instrumented
+
+WINDOW = 30
+MAX_CACHE_ENTRIES = 32
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+
+@dataclass(frozen=True)
+class Indicators:
+    # Wide (Date x ticker) frames, one column per ticker
+    close: pd.DataFrame
+    rolling_mean: pd.DataFrame
+    rolling_std: pd.DataFrame
+    daily_return: pd.DataFrame
+    volatility: pd.DataFrame
+
+    def upper_band(self, k: float = 2) -> pd.DataFrame:
+        return self.rolling_mean + self.rolling_std * k
+
+    def lower_band(self, k: float = 2) -> pd.DataFrame:
+        return self.rolling_mean - self.rolling_std * k
+
+
+def close_prices(df: pd.DataFrame) -> pd.DataFrame:
+    # Handle multi-level columns from yfinance
+    if isinstance(df.columns, pd.MultiIndex):
+        if "Close" not in df.columns.get_level_values(0):
+            return pd.DataFrame(index=df.index)
+        return df["Close"]
+    return df.select_dtypes(include=["float64", "int64"])
+
+
+def fingerprint(frame: pd.DataFrame) -> str:
+    # Content hash of values, index and column labels
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+    digest.update(repr(list(frame.columns)).encode())
+    return digest.hexdigest()
+
+
+def compute_indicators(close: pd.DataFrame, window: int = WINDOW) -> Indicators:
+    # One vectorized pass over the wide Close frame for every ticker at once
+    rolling = close.rolling(window=window)
+    daily_return = close.pct_change()
+    return Indicators(
+        close=close,
+        rolling_mean=rolling.mean(),
+        rolling_std=rolling.std(),
+        daily_return=daily_return,
+        volatility=daily_return.rolling(window=window).std(),
+    )
+
+
+@instrumented
+def get_indicators(df: pd.DataFrame, window: int = WINDOW) -> Indicators:
+    # Memoized on (dataset fingerprint, window); each cached entry covers every
+    # ticker of the dataset, callers pick their tickers from the wide frames.
+    close = close_prices(df)
+    key = (fingerprint(close), window)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            stats["hits"] += 1
+            return _cache[key]
+
+    result = compute_indicators(close, window)
+    with _lock:
+        stats["misses"] += 1
+        _cache[key] = result
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return result
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
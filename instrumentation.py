@@ -0,0 +1,275 @@
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+
+# Opt-in hot-path instrumentation: wall time, peak traced allocation and
+# payload bytes per named span. Spans only record while a Recorder is active
+# in the current context (each Streamlit session runs its script in its own
+# thread); otherwise `span` hands back a shared no-op context and
+# `instrumented` functions cost one ContextVar lookup per call. Standard
+# library only, so the engine modules can decorate their entry points.
+
+# Script runs kept per recorder
+MAX_RUNS = 20
+METRIC_PREFIX = "tsa"
+
+logger = logging.getLogger("instrumentation")
+_active = ContextVar("instrumentation_recorder", default=None)
+_null = nullcontext()
+# Runs currently holding tracemalloc on, across all sessions, and whether
+# this module started it (an outside start, e.g. -X tracemalloc, is left on)
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+_tracing_owned = False
+
+
+def _hold_tracing():
+    global _tracing_runs, _tracing_owned
+    with _tracing_lock:
+        if _tracing_runs == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_runs += 1
+
+
+def _release_tracing():
+    global _tracing_runs, _tracing_owned
+    with _tracing_lock:
+        _tracing_runs -= 1
+        if _tracing_runs == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+@dataclass
+class Span:
+    name: str
+    path: str  # parent span names joined with "/"
+    depth: int
+    seconds: float = 0.0
+    peak_bytes: int = None  # None unless memory tracking is on
+    payload_bytes: int = 0  # charts and tables sent to the browser, including nested spans
+    error: str = None
+
+
+@dataclass
+class Run:
+    label: str
+    started: float  # epoch seconds
+    spans: list = field(default_factory=list)
+
+    @property
+    def seconds(self) -> float:
+        return self.spans[0].seconds if self.spans else 0.0
+
+
+class _Frame:
+    # An open span plus its running allocation high-water mark
+    __slots__ = ("span", "started", "base", "high")
+
+    def __init__(self, span: Span, base: int):
+        self.span = span
+        self.started = time.perf_counter()
+        self.base = base
+        self.high = base
+
+
+class _SpanContext:
+    def __init__(self, recorder, name: str):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.recorder._push(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder._pop(None if exc is None else f"{exc_type.__name__}: {exc}")
+        return False
+
+
+class Recorder:
+    # Keeps the spans of the last MAX_RUNS runs of one session. Memory
+    # tracking runs tracemalloc for the whole process, which slows every
+    # allocation, so it is a separate switch from timing, and tracemalloc is
+    # only on while some run with it is open: the last one to end stops it.
+    # tracemalloc's peak is process-wide: with several sessions tracing at
+    # once, peaks are an upper bound rather than exact.
+    def __init__(self, memory: bool = False, log: bool = False):
+        self.memory = memory
+        self.log = log
+        self.runs = deque(maxlen=MAX_RUNS)
+        self._stack = []
+        self._tracing = False  # this run holds tracemalloc on
+
+    def _traced(self) -> tuple:
+        return tracemalloc.get_traced_memory() if self._tracing else (0, 0)
+
+    def _push(self, name: str):
+        current, peak = self._traced()
+        if self._stack:
+            parent = self._stack[-1]
+            parent.high = max(parent.high, peak)
+            path = f"{parent.span.path}/{name}"
+        else:
+            path = name
+        if self._tracing:
+            # Peaks are tracked per frame, so the global peak can restart here
+            tracemalloc.reset_peak()
+        span = Span(name, path, len(self._stack))
+        self.runs[-1].spans.append(span)
+        self._stack.append(_Frame(span, current))
+
+    def _pop(self, error: str = None):
+        frame = self._stack.pop()
+        span = frame.span
+        span.seconds = time.perf_counter() - frame.started
+        span.error = error
+        if self._tracing:
+            _, peak = self._traced()
+            frame.high = max(frame.high, peak)
+            span.peak_bytes = frame.high - frame.base
+        if self._stack:
+            parent = self._stack[-1]
+            parent.high = max(parent.high, frame.high)
+            parent.span.payload_bytes += span.payload_bytes
+
+    def span(self, name: str) -> _SpanContext:
+        return _SpanContext(self, name)
+
+    def add_payload(self, nbytes: int):
+        if self._stack:
+            self._stack[-1].span.payload_bytes += nbytes
+
+    def _begin(self, label: str):
+        if self.memory and not self._tracing:
+            _hold_tracing()
+            self._tracing = True
+        self._stack.clear()
+        self.runs.append(Run(label, time.time()))
+        self._push(label)
+
+    def _end(self, error: str = None):
+        while len(self._stack) > 1:
+            self._pop("span left open")
+        self._pop(error)
+        if self._tracing:
+            self._tracing = False
+            _release_tracing()
+        if self.log:
+            for record in run_records(self.runs[-1]):
+                logger.info(json.dumps(record, default=str))
+
+    def last_run(self) -> Run:
+        return self.runs[-1] if self.runs else None
+
+
+class _RunContext:
+    def __init__(self, recorder: Recorder, label: str):
+        self.recorder = recorder
+        self.label = label
+
+    def __enter__(self):
+        self.recorder._begin(self.label)
+        self.token = _active.set(self.recorder)
+        return self.recorder
+
+    def __exit__(self, exc_type, exc, tb):
+        _active.reset(self.token)
+        self.recorder._end(None if exc is None else f"{exc_type.__name__}: {exc}")
+        return False
+
+
+def recording(recorder: Recorder, label: str):
+    # Start a run on `recorder` for this context, or, if it is already
+    # recording here (a fragment inside a full script run), just a span
+    if recorder is None:
+        return _null
+    if _active.get() is recorder:
+        return recorder.span(label)
+    return _RunContext(recorder, label)
+
+
+def active() -> Recorder:
+    return _active.get()
+
+
+def span(name: str):
+    recorder = _active.get()
+    return _null if recorder is None else recorder.span(name)
+
+
+def add_payload(nbytes: int):
+    recorder = _active.get()
+    if recorder is not None:
+        recorder.add_payload(nbytes)
+
+
+def instrumented(func=None, *, name: str = None):
+    # Decorator: record each call as a span named after the function. The
+    # wrapper keeps the function's module and qualname, so it still pickles
+    # for the process pools (workers have no recorder and just call through).
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _active.get()
+            if recorder is None:
+                return func(*args, **kwargs)
+            with recorder.span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate if func is None else decorate(func)
+
+
+def run_records(run: Run) -> list:
+    # One flat, JSON-ready dict per span
+    return [{"run": run.label, "started": run.started, **asdict(span)} for span in run.spans]
+
+
+def json_lines(runs) -> str:
+    return "".join(json.dumps(record, default=str) + "\n" for run in runs for record in run_records(run))
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def prometheus_text(runs, prefix: str = METRIC_PREFIX) -> str:
+    # Prometheus text exposition format, aggregated per span path over the
+    # retained runs: call and time counters, payload counter, peak gauge
+    totals = {}
+    for run in runs:
+        for span in run.spans:
+            entry = totals.setdefault(span.path, {"calls": 0, "seconds": 0.0, "payload": 0, "peak": None,
+                                                  "errors": 0})
+            entry["calls"] += 1
+            entry["seconds"] += span.seconds
+            entry["payload"] += span.payload_bytes
+            entry["errors"] += span.error is not None
+            if span.peak_bytes is not None:
+                entry["peak"] = max(entry["peak"] or 0, span.peak_bytes)
+
+    metrics = [
+        ("span_calls_total", "counter", "Times the span ran", "calls"),
+        ("span_errors_total", "counter", "Times the span raised", "errors"),
+        ("span_seconds_total", "counter", "Wall time spent in the span", "seconds"),
+        ("span_payload_bytes_total", "counter", "Serialized chart and table bytes sent from the span", "payload"),
+        ("span_peak_bytes", "gauge", "Largest traced allocation peak of the span", "peak"),
+    ]
+    lines = []
+    for metric, kind, help_text, key in metrics:
+        lines.append(f"# HELP {prefix}_{metric} {help_text}")
+        lines.append(f"# TYPE {prefix}_{metric} {kind}")
+        for path, entry in totals.items():
+            if entry[key] is not None:
+                lines.append(f"{prefix}_{metric}{{span=\"{_label(path)}\"}} {entry[key]}")
+    return "\n".join(lines) + "\n"
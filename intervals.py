@@ -0,0 +1,4 @@
+# Bar sizes offered for download (yfinance interval codes), finest last.
+# Plain constants with no imports, so the CLI's argument parser and the
+# app's sidebar can offer them before numpy and pandas are loaded.
+INTERVALS = ["1d", "1h", "30m", "15m", "5m", "2m", "1m"]
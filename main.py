@@ -0,0 +1,168 @@
+import argparse
+import os
+import sys
+import time
+
+from intervals import INTERVALS
+
+# Headless entry point: runs the analytics core over a ticker list and writes
+# the results to disk. Only argparse and the dependency-free interval list
+# are imported at module level so that `python main.py --help` starts
+# instantly; pandas and the analysis modules are imported once arguments are
+# parsed, and streamlit/plotly never are.
+
+FORMATS = ("parquet", "json")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the time-series analysis without the Streamlit UI.")
+    parser.add_argument("tickers", nargs="*", help="Ticker symbols (default: every ticker in --input)")
+    parser.add_argument("--start", default="2019-01-01", help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="End date (YYYY-MM-DD, default: today)")
+    parser.add_argument("--input", default=None,
+                        help="Read prices from a CSV in yfinance layout or a snapshot directory instead of downloading")
+    parser.add_argument("--window", type=int, default=30, help="Rolling window in bars")
+    parser.add_argument("--period", type=int, default=None,
+                        help="Seasonal decomposition period (default: one trading year of daily bars, "
+                             "one session of intraday bars)")
+    parser.add_argument("--interval", choices=INTERVALS, default="1d", help="Bar size to download")
+    parser.add_argument("--resample", default=None, metavar="RULE",
+                        help="Aggregate the bars to this coarser size first (pandas alias, e.g. 15min, 1h, 1D, W)")
+    parser.add_argument("--format", choices=FORMATS, default="parquet", help="Output format")
+    parser.add_argument("--out", default="output", help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for the batch analysis")
+    parser.add_argument("--sweep", choices=["bollinger", "ma_crossover"], default=None,
+                        help="Also backtest this strategy over its default parameter grid")
+    parser.add_argument("--forecast", type=int, default=None, metavar="BARS",
+                        help="Also forecast this many bars ahead with auto_arima (models are reused across runs)")
+    parser.add_argument("--scan", type=int, default=None, metavar="BARS",
+                        help="Also scan every ticker's last BARS bars for band breaches, volatility shifts "
+                             "and return outliers")
+    parser.add_argument("--chunked", choices=["tickers", "time"], default=None,
+                        help="Stream the snapshot directory given as --input in ticker or time blocks instead of "
+                             "loading it, for panels larger than memory; writes every ticker's moments, histograms "
+                             "and an indicator snapshot")
+    parser.add_argument("--memory-budget", type=int, default=512, metavar="MB",
+                        help="Working memory per block with --chunked")
+    return parser.parse_args(argv)
+
+
+def load_input(path: str):
+    import pandas as pd
+
+    if os.path.isdir(path):
+        from snapshot import SnapshotStore
+
+        root, name = os.path.split(os.path.normpath(path))
+        return SnapshotStore(root or ".").open(name)
+    return pd.read_csv(path, header=[0, 1], index_col=0, parse_dates=True)
+
+
+def write_result(frame, out_dir: str, name: str, fmt: str) -> str:
+    path = os.path.join(out_dir, f"{name}.{fmt}")
+    if fmt == "parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_json(path, orient="records", date_format="iso", indent=2)
+    return path
+
+
+def run_chunked(args) -> int:
+    from chunked import chunked_indicators, chunked_statistics, histogram_table
+    from snapshot import SnapshotStore
+
+    if not (args.input and os.path.isdir(args.input)):
+        print("error: --chunked needs --input pointing at a snapshot directory", file=sys.stderr)
+        return 2
+    root, name = os.path.split(os.path.normpath(args.input))
+    reader = SnapshotStore(root or ".").reader(name)
+    budget = args.memory_budget * 2 ** 20
+
+    stats = chunked_statistics(reader, mode=args.chunked, budget=budget)
+    tickers = stats["price_moments"].index
+    results = {
+        "price_moments": stats["price_moments"].reset_index(),
+        "return_moments": stats["return_moments"].reset_index(),
+        "price_histogram": histogram_table(*stats["price_histogram"], tickers),
+        "return_histogram": histogram_table(*stats["return_histogram"], tickers),
+    }
+    os.makedirs(args.out, exist_ok=True)
+    for result, frame in results.items():
+        print(write_result(frame, args.out, result, args.format))
+    # Indicators are as long as the panel, so they go to a snapshot, not a table
+    chunked_indicators(reader, SnapshotStore(args.out), "indicators", window=args.window, mode=args.chunked,
+                       budget=budget)
+    print(os.path.join(args.out, "indicators"))
+    return 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    started = time.perf_counter()
+    if args.chunked:
+        status = run_chunked(args)
+        print(f"done in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+        return status
+
+    import pandas as pd
+
+    from analytics import download, run_analysis
+    from indicators import close_prices
+    from panel import normalize_panel
+    from shared_store import normalize_tickers
+
+    # Cleaned and upper-cased once; every step below uses this list
+    tickers = normalize_tickers(args.tickers)
+    if args.input:
+        df = load_input(args.input)
+    elif tickers:
+        end = args.end or pd.Timestamp.today().strftime("%Y-%m-%d")
+        df = download(tickers, args.start, end, interval=args.interval)
+    else:
+        print("error: give tickers to download or --input", file=sys.stderr)
+        return 2
+    if df.empty:
+        print("error: no price data", file=sys.stderr)
+        return 1
+    df = normalize_panel(df)
+    if tickers:
+        available = set(close_prices(df).columns)
+        unknown = [t for t in tickers if t not in available]
+        if len(unknown) == len(tickers):
+            print(f"error: no price data for {', '.join(unknown)}", file=sys.stderr)
+            return 1
+        if unknown:
+            print(f"warning: no price data for {', '.join(unknown)}; skipping them", file=sys.stderr)
+        tickers = [t for t in tickers if t in available]
+    if args.resample:
+        from bars import resample_ohlcv
+
+        df = resample_ohlcv(df, args.resample)
+
+    results = run_analysis(df, tickers or None, window=args.window, period=args.period,
+                           max_workers=args.workers)
+    if args.sweep:
+        from backtest import rank_params, sweep
+
+        results["sweep"] = sweep(df, args.sweep, tickers=tickers or None, max_workers=args.workers)
+        results["sweep_ranking"] = rank_params(results["sweep"])
+    if args.forecast:
+        from forecast import forecast_many, forecast_status, forecast_table
+
+        forecasts = forecast_many(df, tickers or None, horizon=args.forecast, max_workers=args.workers)
+        results["forecast"] = forecast_table(forecasts)
+        results["forecast_status"] = forecast_status(forecasts)
+    if args.scan:
+        from scanner import scan
+
+        alerts = scan(df, bars=args.scan, window=args.window)
+        results["alerts"] = alerts[alerts["Ticker"].isin(tickers)].reset_index(drop=True) if tickers else alerts
+    os.makedirs(args.out, exist_ok=True)
+    for name, frame in results.items():
+        print(write_result(frame, args.out, name, args.format))
+    print(f"done in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
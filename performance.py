@@ -0,0 +1,70 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.colors import DEFAULT_PLOTLY_COLORS
+from backtest import backtest, sweep, rank_params
+from diagnostics import dataframe, plotly_chart
+from figures import add_lines
+from indicators import WINDOW
+from instrumentation import instrumented
+from window_tensor import WINDOWS, K
+
+STRATEGY_NAMES = {"Bollinger mean reversion": "bollinger", "MA crossover": "ma_crossover"}
+
+@instrumented
+def plot_backtest(df: pd.DataFrame, tickers: list, date_range=None, window: int = WINDOW):
+    st.title("📊 Strategy Backtest")
+
+    if df.empty:
+        st.warning("No data available for backtesting.")
+        return
+
+    label = st.radio("Strategy", list(STRATEGY_NAMES), horizontal=True)
+    strategy = STRATEGY_NAMES[label]
+    long_only = st.checkbox("Long only", value=False)
+
+    # The rolling window slider sets the band window / the fast moving average
+    if strategy == "bollinger":
+        params = {"window": window, "k": K}
+        st.subheader(f"{window}-Day Bollinger Bands (k={K}): long below the lower band, short above the upper")
+    else:
+        slow_options = [w for w in WINDOWS if w > window]
+        if not slow_options:
+            st.info("Pick a shorter rolling window; it is used as the fast moving average.")
+            return
+        slow = st.select_slider("Slow moving average (days)", options=slow_options,
+                                value=min(slow_options, key=lambda w: abs(w - 4 * window)))
+        params = {"fast": window, "slow": slow}
+        st.subheader(f"{window}/{slow}-Day Moving Average Crossover")
+
+    result = backtest(df, strategy, tickers=tickers, long_only=long_only, **params)
+    if result.summary.empty:
+        st.info("No valid columns found for backtesting.")
+        return
+    st.write("Performance (after 5 bps per unit of turnover):")
+    dataframe(result.summary)
+
+    # Equity curves of every plotted ticker on one chart
+    fig = go.Figure()
+    equity = result.equity
+    add_lines(fig, equity.index, [
+        (equity[ticker].to_numpy(), str(ticker), DEFAULT_PLOTLY_COLORS[i % len(DEFAULT_PLOTLY_COLORS)])
+        for i, ticker in enumerate(equity.columns)
+    ], date_range=date_range)
+    fig.update_layout(
+        height=400,
+        width=1000,
+        showlegend=True,
+        title_text="Strategy Equity (growth of 1)",
+        title_x=0.5,
+        xaxis_title="Date",
+        yaxis_title="Equity",
+        legend_title_text="Ticker"
+    )
+    plotly_chart(fig, use_container_width=True)
+
+    # Whole default grid for the plotted tickers, in worker processes when large
+    if st.button("Run Parameter Sweep"):
+        results = sweep(df, strategy, tickers=tickers, long_only=long_only)
+        st.write("Median across tickers for each parameter set, best Sharpe first:")
+        dataframe(rank_params(results))
@@ -0,0 +1,90 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from decomposition import PERIOD, decompose_series
+from indicators import WINDOW, close_prices, compute_indicators
+from instrumentation import instrumented
+
+CHUNK_SIZE = 50
+# Below this many tickers a process pool costs more than it saves
+MIN_PARALLEL_TICKERS = 24
+DECOMPOSE_PERIOD = PERIOD
+
+
+def shard(tickers: list, chunk_size: int = CHUNK_SIZE) -> list:
+    return [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+
+
+def _last_valid(frame: pd.DataFrame) -> pd.Series:
+    return frame.ffill().iloc[-1] if len(frame) else pd.Series(np.nan, index=frame.columns)
+
+
+def analyze_chunk(close: pd.DataFrame, window: int = WINDOW, k: float = 2,
+                  period: int = DECOMPOSE_PERIOD) -> pd.DataFrame:
+    # Summary rows for one shard of tickers (runs inside a worker process)
+    indicators = compute_indicators(close, window)
+    last_close = _last_valid(close)
+    first_close = close.bfill().iloc[0] if len(close) else last_close
+    rolling_mean = _last_valid(indicators.rolling_mean)
+    rolling_std = _last_valid(indicators.rolling_std)
+    upper_band = rolling_mean + rolling_std * k
+    lower_band = rolling_mean - rolling_std * k
+    band_width = (upper_band - lower_band).replace(0, np.nan)
+
+    summary = pd.DataFrame({
+        "observations": close.count(),
+        "last_close": last_close,
+        "total_return": last_close / first_close - 1,
+        "mean_daily_return": indicators.daily_return.mean(),
+        "volatility": _last_valid(indicators.volatility),
+        "rolling_mean": rolling_mean,
+        "rolling_std": rolling_std,
+        "upper_band": upper_band,
+        "lower_band": lower_band,
+        "percent_b": (last_close - lower_band) / band_width,
+    })
+    summary["signal"] = np.select(
+        [last_close > upper_band, last_close < lower_band],
+        ["above upper band", "below lower band"],
+        default="inside bands",
+    )
+
+    # Already inside a worker process, so decompose serially here
+    decompositions = [decompose_series(close[ticker], period=period, tests=False) for ticker in close.columns]
+    summary["trend_strength"] = [np.nan if d.error else d.trend_strength for d in decompositions]
+    summary["seasonal_strength"] = [np.nan if d.error else d.seasonal_strength for d in decompositions]
+    summary.index.name = "Ticker"
+    return summary
+
+
+@instrumented
+def run_batch(df: pd.DataFrame, tickers: list = None, window: int = WINDOW, k: float = 2,
+              period: int = DECOMPOSE_PERIOD, chunk_size: int = CHUNK_SIZE,
+              max_workers: int = None) -> pd.DataFrame:
+    # Headless analysis over an arbitrary ticker universe. Tickers are sharded
+    # into chunks and each chunk is analysed in a separate worker process.
+    close = close_prices(df)
+    if tickers is None:
+        tickers = close.columns.tolist()
+    tickers = [t.strip() for t in tickers if t.strip() in close.columns]
+    if not tickers:
+        return pd.DataFrame()
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if len(tickers) < MIN_PARALLEL_TICKERS:
+        max_workers = 1
+    # Keep every worker busy: never make fewer chunks than workers
+    chunk_size = max(1, min(chunk_size, -(-len(tickers) // max_workers)))
+    chunks = [close[chunk] for chunk in shard(tickers, chunk_size)]
+    if len(chunks) == 1 or max_workers == 1:
+        results = [analyze_chunk(chunk, window, k, period) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            results = list(executor.map(
+                analyze_chunk, chunks,
+                [window] * len(chunks), [k] * len(chunks), [period] * len(chunks),
+            ))
+    return pd.concat(results).reset_index()
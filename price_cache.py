@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+
+CACHE_DIR = os.path.join(".cache", "prices")
+INTERVAL = "1d"
+FIELDS = ["Close", "High", "Low", "Open", "Volume"]
+
+# A gap shorter than this that comes back empty for every ticker is treated as
+# a market holiday / weekend and remembered, so it is not fetched again.
+MAX_CLOSED_GAP_DAYS = 7
+
+
+class FetchError(Exception):
+    # Raised by a fetcher when some tickers could not be fetched: `panel`
+    # holds what did arrive, `failed` the tickers whose ranges must not be
+    # marked as covered and `errors` what went wrong for each, where known
+    def __init__(self, panel: pd.DataFrame, failed: list, errors: dict = None):
+        self.errors = errors or {}
+        reasons = [f"{t} ({self.errors[t]})" if t in self.errors else t for t in failed]
+        super().__init__(f"could not fetch {', '.join(reasons)}")
+        self.panel = panel
+        self.failed = list(failed)
+
+
+class YFinanceFetcher:
+    # Default data source. Anything with the same fetch() signature can be
+    # handed to PriceCache instead, e.g. a local stand-in for yfinance.
+    # Intraday ranges longer than Yahoo accepts in one call are split.
+    # Tickers are fetched one by one with raise_errors: yf.download logs a
+    # failed symbol and hands back an empty frame, which would look like a
+    # market closure. Only Yahoo answering "no price data" counts as empty;
+    # any other error ends in FetchError, so the range is asked for again.
+    def __init__(self, interval: str = INTERVAL):
+        self.interval = interval
+
+    def _history(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        import yfinance as yf
+        from yfinance.exceptions import YFPricesMissingError
+
+        try:
+            return yf.Ticker(ticker).history(start=start, end=end, interval=self.interval, actions=False,
+                                             raise_errors=True)
+        except YFPricesMissingError as e:
+            # An HTTP error status comes through the same exception
+            if "status_code" in str(e):
+                raise
+            return pd.DataFrame()
+
+    def fetch(self, tickers: list, start: date, end: date) -> pd.DataFrame:
+        from bars import request_ranges
+
+        ranges = request_ranges(start, end, self.interval)
+        frames = {}
+        errors = {}
+        for ticker in tickers:
+            try:
+                parts = [self._history(ticker, s, e) for s, e in ranges]
+            except Exception as e:
+                errors[ticker] = f"{type(e).__name__}: {e}"
+                continue
+            parts = [part for part in parts if part is not None and not part.empty]
+            if parts:
+                frames[ticker] = split_by_ticker(pd.concat(parts), [ticker])[ticker]
+        panel = to_panel(frames)
+        if errors:
+            raise FetchError(panel, list(errors), errors)
+        return panel
+
+
+def interval_cache_dir(interval: str = INTERVAL, root: str = CACHE_DIR) -> str:
+    # Daily bars keep the original location; each intraday bar size gets its own store
+    return root if interval == INTERVAL else os.path.join(root, interval)
+
+
+def _to_date(value) -> date:
+    return pd.Timestamp(value).date()
+
+
+def _merge_ranges(ranges: list) -> list:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _missing_ranges(covered: list, start: date, end: date) -> list:
+    # Subtract the covered [start, end) ranges from the requested one
+    gaps = []
+    cursor = start
+    for c_start, c_end in covered:
+        if c_end <= cursor:
+            continue
+        if c_start >= end:
+            break
+        if c_start > cursor:
+            gaps.append((cursor, c_start))
+        cursor = max(cursor, c_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def to_panel(frames: dict) -> pd.DataFrame:
+    # Assemble per-ticker (Date x field) frames into the (Price, Ticker) layout yf.download returns
+    frames = {ticker: frame for ticker, frame in frames.items() if frame is not None and not frame.empty}
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, axis=1, names=["Ticker", "Price"])
+    df = df.swaplevel(axis=1)
+    order = [(field, ticker) for field in FIELDS for ticker in frames if (field, ticker) in df.columns]
+    df = df[order]
+    df.index.name = "Date"
+    return df
+
+
+def split_by_ticker(df: pd.DataFrame, tickers: list) -> dict:
+    # Turn a yfinance-shaped frame into one (Date x field) frame per ticker
+    frames = {}
+    if df is None or df.empty:
+        return frames
+    if isinstance(df.columns, pd.MultiIndex):
+        available = df.columns.get_level_values(-1)
+        for ticker in tickers:
+            if ticker in available:
+                frames[ticker] = df.xs(ticker, level=-1, axis=1)
+    elif len(tickers) == 1:
+        frames[tickers[0]] = df
+    for ticker, frame in frames.items():
+        frame = frame[[f for f in FIELDS if f in frame.columns]].dropna(how="all")
+        frame.index = pd.DatetimeIndex(frame.index).tz_localize(None)
+        frame.index.name = "Date"
+        frame.columns.name = None
+        frames[ticker] = frame
+    return frames
+
+
+class PriceCache:
+    # Persistent per-ticker OHLCV store. Each ticker lives in its own Parquet
+    # file (one row per bar, one store per bar size) and a small manifest remembers which
+    # [start, end) date ranges have already been requested, so only the gaps
+    # of a new request are sent to the fetcher.
+    def __init__(self, cache_dir: str = CACHE_DIR, fetcher=None):
+        self.cache_dir = cache_dir
+        self.fetcher = fetcher if fetcher is not None else YFinanceFetcher()
+        self.last_fetches = []
+        # One process-wide cache is shared by every Streamlit session
+        self._lock = threading.RLock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._manifest_path = os.path.join(cache_dir, "manifest.json")
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self) -> dict:
+        if not os.path.exists(self._manifest_path):
+            return {}
+        with open(self._manifest_path) as f:
+            raw = json.load(f)
+        return {
+            ticker: [[date.fromisoformat(s), date.fromisoformat(e)] for s, e in ranges]
+            for ticker, ranges in raw.items()
+        }
+
+    def _save_manifest(self):
+        raw = {
+            ticker: [[s.isoformat(), e.isoformat()] for s, e in ranges]
+            for ticker, ranges in self._manifest.items()
+        }
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(raw, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.cache_dir, f"{ticker}.parquet")
+
+    def _read(self, ticker: str) -> pd.DataFrame:
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=FIELDS, index=pd.DatetimeIndex([], name="Date"))
+        return pd.read_parquet(path)
+
+    def _write(self, ticker: str, frame: pd.DataFrame):
+        tmp_path = self._path(ticker) + ".tmp"
+        frame.to_parquet(tmp_path)
+        os.replace(tmp_path, self._path(ticker))
+
+    def missing_ranges(self, ticker: str, start, end) -> list:
+        return _missing_ranges(self._manifest.get(ticker, []), _to_date(start), _to_date(end))
+
+    def _append_rows(self, ticker: str, new_rows: pd.DataFrame):
+        existing = self._read(ticker)
+        combined = pd.concat([existing, new_rows]) if not existing.empty else new_rows
+        combined = combined[~combined.index.duplicated(keep="last")].sort_index()
+        self._write(ticker, combined)
+
+    def _mark_covered(self, ticker: str, start: date, end: date):
+        if start < end:
+            ranges = self._manifest.get(ticker, []) + [[start, end]]
+            self._manifest[ticker] = _merge_ranges(ranges)
+
+    def fetch_missing(self, tickers: list, start, end, on_result=None):
+        start, end = _to_date(start), _to_date(end)
+        # Days from today onwards may still change, so never mark them as covered
+        settled_end = min(end, date.today())
+
+        # Group tickers that share the same gap so each gap is one fetch call
+        by_gap = {}
+        for ticker in tickers:
+            for gap in _missing_ranges(self._manifest.get(ticker, []), start, end):
+                by_gap.setdefault(gap, []).append(ticker)
+
+        self.last_fetches = []
+        for (gap_start, gap_end), gap_tickers in sorted(by_gap.items()):
+            # on_result is only passed to fetchers that report per-ticker progress
+            kwargs = {"on_result": on_result} if on_result is not None else {}
+            try:
+                raw, failed = self.fetcher.fetch(gap_tickers, gap_start, gap_end, **kwargs), set()
+            except FetchError as e:
+                raw, failed = e.panel, set(e.failed)
+            self.last_fetches.append((gap_tickers, gap_start, gap_end))
+            frames = split_by_ticker(raw, gap_tickers)
+            covered_end = min(gap_end, settled_end)
+            # Closed only if every ticker answered, and answered with no rows
+            market_closed = not failed and not frames and (gap_end - gap_start) <= timedelta(days=MAX_CLOSED_GAP_DAYS)
+            for ticker in gap_tickers:
+                frame = frames.get(ticker)
+                if ticker in failed:
+                    # Fetched again next time
+                    continue
+                if frame is None or frame.empty:
+                    # An empty answer only means "no trading" if nobody got rows
+                    if market_closed:
+                        self._mark_covered(ticker, gap_start, covered_end)
+                    continue
+                self._append_rows(ticker, frame)
+                self._mark_covered(ticker, gap_start, covered_end)
+            self._save_manifest()
+
+    def load(self, tickers: list, start, end) -> pd.DataFrame:
+        start, end = pd.Timestamp(_to_date(start)), pd.Timestamp(_to_date(end))
+        frames = {}
+        for ticker in tickers:
+            frame = self._read(ticker)
+            frames[ticker] = frame[(frame.index >= start) & (frame.index < end)]
+        return to_panel(frames)
+
+    def get(self, tickers: list, start, end, on_result=None) -> pd.DataFrame:
+        with self._lock:
+            self.fetch_missing(tickers, start, end, on_result=on_result)
+            return self.load(tickers, start, end)
@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+from indicators import close_prices
+from instrumentation import instrumented
+
+CORRELATION_WINDOW = 60
+
+
+@instrumented
+def return_matrix(df: pd.DataFrame, tickers: list = None, log: bool = False) -> pd.DataFrame:
+    # (Date x ticker) simple or log returns for every ticker in one step
+    close = close_prices(df)
+    if tickers is not None:
+        close = close[[t.strip() for t in tickers if t.strip() in close.columns]]
+    values = close.to_numpy(dtype=np.float64, na_value=np.nan)
+    returns = np.full(values.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if log:
+            returns[1:] = np.log(values[1:] / values[:-1])
+        else:
+            returns[1:] = values[1:] / values[:-1] - 1
+    return pd.DataFrame(returns, index=close.index, columns=close.columns)
+
+
+def _centered(returns: pd.DataFrame) -> tuple:
+    # Values with gaps zeroed after subtracting each column's mean (so the
+    # cross products below do not lose precision), and the 0/1 presence mask
+    x = returns.to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = ~np.isnan(x)
+    counts = valid.sum(axis=0)
+    means = np.where(counts > 0, np.where(valid, x, 0.0).sum(axis=0) / np.maximum(counts, 1), 0.0)
+    return np.where(valid, x - means, 0.0), valid.astype(np.float64)
+
+
+@instrumented
+def covariance(returns: pd.DataFrame, min_periods: int = 2) -> pd.DataFrame:
+    # Pairwise-complete sample covariance, like DataFrame.cov(), from a few
+    # matrix products instead of a loop over pairs
+    x, mask = _centered(returns)
+    pairs = mask.T @ mask
+    sum_x = x.T @ mask  # [i, j]: sum of x_i over rows where both i and j are present
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (x.T @ x - sum_x * sum_x.T / pairs) / (pairs - 1)
+    cov[pairs < max(min_periods, 2)] = np.nan
+    return pd.DataFrame(cov, index=returns.columns, columns=returns.columns)
+
+
+@instrumented
+def correlation(returns: pd.DataFrame, min_periods: int = 2) -> pd.DataFrame:
+    # Pairwise-complete Pearson correlation, like DataFrame.corr(); each
+    # pair is normalised by the variances over the rows the pair shares
+    x, mask = _centered(returns)
+    pairs = mask.T @ mask
+    sum_x = x.T @ mask
+    sum_xx = (x * x).T @ mask
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cross = x.T @ x - sum_x * sum_x.T / pairs
+        var = sum_xx - sum_x * sum_x / pairs
+        corr = np.clip(cross / np.sqrt(var * var.T), -1.0, 1.0)
+    corr[pairs < max(min_periods, 2)] = np.nan
+    return pd.DataFrame(corr, index=returns.columns, columns=returns.columns)
+
+
+class RollingCovariance:
+    # Covariance / correlation of the last `window` bars across many tickers,
+    # updated incrementally. It keeps a ring buffer of the last `window`
+    # return rows plus the running sums and cross-product matrix, so a new
+    # bar costs one rank update (or one small matrix product for a block of
+    # bars) instead of recomputing every window. Like pandas
+    # rolling(window).cov(), a ticker with a missing bar in the window has
+    # NaN covariances until the gap leaves the window.
+    def __init__(self, tickers: list, window: int = CORRELATION_WINDOW):
+        n = len(tickers)
+        self.tickers = list(tickers)
+        self.window = window
+        self.buffer = np.zeros((window, n))
+        self.gaps = np.zeros((window, n), dtype=bool)
+        self.pos = 0
+        self.count = 0
+        self.sum_x = np.zeros(n)
+        self.sum_xx = np.zeros((n, n))
+        self.missing = np.zeros(n, dtype=np.int64)
+
+    @classmethod
+    def from_returns(cls, returns: pd.DataFrame, window: int = CORRELATION_WINDOW):
+        rolling = cls(returns.columns.tolist(), window)
+        rolling.update_many(returns.to_numpy(dtype=np.float64, na_value=np.nan))
+        return rolling
+
+    def update(self, row):
+        self.update_many(np.asarray(row, dtype=np.float64)[None, :])
+
+    def update_many(self, rows: np.ndarray):
+        rows = np.asarray(rows, dtype=np.float64)
+        # Only the last `window` rows can still be in the window; storing a
+        # full window's worth wraps the ring and rebuilds the sums
+        if len(rows) > self.window:
+            skipped = len(rows) - self.window
+            self.pos = (self.pos + skipped) % self.window
+            self.count += skipped
+            rows = rows[skipped:]
+        self._store(rows)
+
+    def _store(self, rows: np.ndarray):
+        slots = (self.pos + np.arange(len(rows))) % self.window
+        new_gaps = np.isnan(rows)
+        new = np.where(new_gaps, 0.0, rows)
+        old = self.buffer[slots]
+        # Slots not filled yet hold zeros, so they drop out of the update
+        self.sum_x += new.sum(axis=0) - old.sum(axis=0)
+        self.sum_xx += new.T @ new - old.T @ old
+        self.missing += new_gaps.sum(axis=0) - self.gaps[slots].sum(axis=0)
+        self.buffer[slots] = new
+        self.gaps[slots] = new_gaps
+        wrapped = self.pos + len(rows) >= self.window
+        self.pos = (self.pos + len(rows)) % self.window
+        self.count += len(rows)
+        # Once per full turn of the ring, rebuild the sums from the buffer so
+        # rounding error cannot build up (amortized one row product per bar)
+        if wrapped:
+            self._recompute()
+
+    def _recompute(self):
+        self.sum_x = self.buffer.sum(axis=0)
+        self.sum_xx = self.buffer.T @ self.buffer
+        self.missing = self.gaps.sum(axis=0)
+
+    @property
+    def ready(self) -> np.ndarray:
+        return (self.count >= self.window) & (self.missing == 0)
+
+    def covariance(self) -> np.ndarray:
+        w = self.window
+        cov = (self.sum_xx - np.outer(self.sum_x, self.sum_x) / w) / (w - 1)
+        ready = self.ready
+        cov[~ready, :] = np.nan
+        cov[:, ~ready] = np.nan
+        return cov
+
+    def correlation(self) -> np.ndarray:
+        cov = self.covariance()
+        std = np.sqrt(np.maximum(np.diag(cov), 0.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.clip(cov / np.outer(std, std), -1.0, 1.0)
+        np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+        return corr
+
+    def mean_correlation(self) -> tuple:
+        # Each ticker's average correlation with the other ready tickers, and
+        # the overall average, from one matrix-vector product; the full
+        # correlation matrix is never formed
+        w = self.window
+        ready = self.ready
+        var = (np.diagonal(self.sum_xx) - self.sum_x ** 2 / w) / (w - 1)
+        std = np.sqrt(np.maximum(var, 0.0))
+        ready &= std > 0
+        n_ready = int(ready.sum())
+        per_ticker = np.full(len(std), np.nan)
+        if n_ready < 2:
+            return per_ticker, np.nan
+        v = np.where(ready, 1 / np.where(ready, std, 1.0), 0.0)
+        cov_v = (self.sum_xx @ v - self.sum_x * (self.sum_x @ v) / w) / (w - 1)
+        per_ticker[ready] = (cov_v[ready] * v[ready] - 1) / (n_ready - 1)
+        return per_ticker, float(per_ticker[ready].mean())
+
+    def frame(self, matrix: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(matrix, index=self.tickers, columns=self.tickers)
+
+
+@instrumented
+def rolling_average_correlation(returns: pd.DataFrame, window: int = CORRELATION_WINDOW,
+                                step: int = 1) -> pd.DataFrame:
+    # Each ticker's mean correlation with the others over time (plus the
+    # cross-sectional "Average"), every `step` bars. The history is fed
+    # through one RollingCovariance, so only (ticker x ticker) state is held
+    # and no per-window matrix or pandas object is ever built.
+    values = returns.to_numpy(dtype=np.float64, na_value=np.nan)
+    rolling = RollingCovariance(returns.columns.tolist(), window)
+    n = values.shape[1]
+    out = np.full((len(values), n + 1), np.nan)
+    fed = 0
+    for t in range(window - 1, len(values), max(1, step)):
+        rolling.update_many(values[fed:t + 1])
+        fed = t + 1
+        out[t, :n], out[t, n] = rolling.mean_correlation()
+    frame = pd.DataFrame(out, index=returns.index, columns=[*map(str, returns.columns), "Average"])
+    return frame if step == 1 else frame.iloc[window - 1::step]
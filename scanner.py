@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+from indicators import WINDOW, close_prices
+from instrumentation import instrumented
+from window_tensor import K, rolling_mean_std
+
+# A return more than this many standard deviations from the mean of the
+# previous `window` returns is an outlier
+Z_THRESHOLD = 3.0
+# Short-window over long-window return volatility beyond this factor, either
+# way, is a volatility regime shift; the long window spans LONG_WINDOWS short ones
+VOL_SHIFT = 1.5
+LONG_WINDOWS = 4
+
+ALERTS = ("Band breach", "Volatility shift", "Return outlier")
+COLUMNS = ["Date", "Ticker", "Alert", "Direction", "Value", "Threshold", "Score", "Price"]
+
+
+def context_rows(window: int, long_window: int) -> int:
+    # Price rows a scanned bar looks back over, itself included: the long
+    # volatility window, or the previous `window` returns plus the current
+    # one, each return needing the price before it
+    return max(long_window, window + 1) + 1
+
+
+def evaluate(values: np.ndarray, bars: int, window: int = WINDOW, long_window: int = None) -> dict:
+    # (bar x ticker) scores for the last `bars` rows of a (time x ticker)
+    # price array, from running sums over just the rows those bars need.
+    # A window touching a missing price gives NaN, like pandas rolling().
+    long_window = long_window or LONG_WINDOWS * window
+    bars = max(1, min(bars, len(values)))
+    values = values[-(bars + context_rows(window, long_window) - 1):]
+    returns = np.full(values.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = values[1:] / values[:-1] - 1
+    (sma,), (std,) = rolling_mean_std(values.T, (window,))
+    return_mean, return_std = rolling_mean_std(returns.T, (window, long_window))
+    # Each return is scored against the window ending the bar before it;
+    # the first row has none, so the shift brings in a NaN column, which
+    # also covers scanning every row of a short panel
+    gap = np.full((len(returns.T), 1), np.nan)
+    prior_mean = np.concatenate([gap, return_mean[0][:, :-1]], axis=1)
+    prior_std = np.concatenate([gap, return_std[0][:, :-1]], axis=1)
+
+    scanned = slice(-bars, None)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        band_z = (values.T[:, scanned] - sma[:, scanned]) / std[:, scanned]
+        return_z = (returns.T[:, scanned] - prior_mean[:, scanned]) / prior_std[:, scanned]
+        vol_ratio = return_std[0][:, scanned] / return_std[1][:, scanned]
+    return {
+        "price": values[scanned],
+        "band_z": band_z.T,
+        "return_z": return_z.T,
+        "vol_ratio": vol_ratio.T,
+    }
+
+
+def alert_table(scores: dict, dates: pd.Index, tickers: list, k: float = K, z: float = Z_THRESHOLD,
+                shift: float = VOL_SHIFT) -> pd.DataFrame:
+    # One row per (bar, ticker, alert), ranked by Score: how far past its
+    # threshold the value is (1 is right at it). Band and return values are
+    # in standard deviations, volatility shifts are short/long ratios.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        checks = [
+            ("Band breach", scores["band_z"], k, np.abs(scores["band_z"]) / k, scores["band_z"] > 0),
+            ("Volatility shift", scores["vol_ratio"], shift,
+             np.abs(np.log(scores["vol_ratio"])) / np.log(shift), scores["vol_ratio"] > 1),
+            ("Return outlier", scores["return_z"], z, np.abs(scores["return_z"]) / z, scores["return_z"] > 0),
+        ]
+    dates = np.asarray(dates)
+    tickers = np.asarray(tickers, dtype=object)
+    frames = []
+    for name, value, threshold, score, up in checks:
+        rows, cols = np.nonzero(np.isfinite(score) & (score > 1))
+        frames.append(pd.DataFrame({
+            "Date": dates[rows],
+            "Ticker": tickers[cols],
+            "Alert": name,
+            "Direction": np.where(up[rows, cols], "up", "down"),
+            "Value": value[rows, cols],
+            "Threshold": threshold,
+            "Score": score[rows, cols],
+            "Price": scores["price"][rows, cols],
+        }, columns=COLUMNS))
+    alerts = pd.concat(frames, ignore_index=True)
+    return alerts.sort_values(["Score", "Date"], ascending=False, ignore_index=True)
+
+
+@instrumented
+def scan(df: pd.DataFrame, bars: int = 1, window: int = WINDOW, k: float = K, z: float = Z_THRESHOLD,
+         shift: float = VOL_SHIFT, long_window: int = None) -> pd.DataFrame:
+    # Ranked alerts over the last `bars` bars of every ticker in one pass.
+    # Only the tail the windows reach is converted, so the cost depends on
+    # the number of tickers, not the length of the history.
+    close = close_prices(df)
+    long_window = long_window or LONG_WINDOWS * window
+    bars = max(1, min(bars, len(close)))
+    if close.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    tail = close.iloc[-(bars + context_rows(window, long_window) - 1):]
+    values = tail.to_numpy(dtype=np.float64, na_value=np.nan)
+    scores = evaluate(values, bars, window, long_window)
+    return alert_table(scores, close.index[-bars:], close.columns.tolist(), k, z, shift)
+
+
+class Scanner:
+    # Incremental scan: keeps the last few prices of every ticker, enough
+    # for the longest window, so each refresh scores only the bars appended
+    # since the last one, with the same windows as scan(). `recent` holds
+    # the ranked alerts of the last `bars` bars seen.
+    def __init__(self, tickers: list, bars: int = 1, window: int = WINDOW, k: float = K, z: float = Z_THRESHOLD,
+                 shift: float = VOL_SHIFT, long_window: int = None):
+        self.tickers = list(tickers)
+        self.bars = max(1, bars)
+        self.window = window
+        self.k = k
+        self.z = z
+        self.shift = shift
+        self.long_window = long_window or LONG_WINDOWS * window
+        self.context = context_rows(window, self.long_window)
+        self.buffer = np.full((0, len(self.tickers)), np.nan)
+        self.dates = pd.DatetimeIndex([])
+        self.recent = pd.DataFrame(columns=COLUMNS)
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, bars: int = 1, **params) -> "Scanner":
+        # Warm up on the prices before the last `bars` bars, then scan those
+        close = close_prices(df)
+        scanner = cls(close.columns.tolist(), bars=bars, **params)
+        split = max(0, len(close) - scanner.bars)
+        scanner.buffer = close.iloc[max(0, split - scanner.context + 1):split].to_numpy(
+            dtype=np.float64, na_value=np.nan)
+        scanner.update(close.iloc[split:])
+        return scanner
+
+    @property
+    def params(self) -> tuple:
+        return self.bars, self.window, self.k, self.z, self.shift, self.long_window
+
+    @property
+    def last(self):
+        return self.dates[-1] if len(self.dates) else None
+
+    @instrumented
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Score the bars dated after the last one seen (any earlier rows of
+        # `df` are skipped, so the whole growing panel can be passed) and
+        # return their alerts
+        close = close_prices(df)
+        if self.last is not None:
+            close = close.loc[close.index > self.last]
+        if close.empty:
+            return pd.DataFrame(columns=COLUMNS)
+        new = close.reindex(columns=self.tickers).to_numpy(dtype=np.float64, na_value=np.nan)
+        values = np.concatenate([self.buffer, new])
+        scores = evaluate(values, len(new), self.window, self.long_window)
+        alerts = alert_table(scores, close.index, self.tickers, self.k, self.z, self.shift)
+
+        self.buffer = values[-(self.context - 1):]
+        self.dates = self.dates.append(pd.DatetimeIndex(close.index))[-self.bars:]
+        kept = self.recent[self.recent["Date"] >= self.dates[0]]
+        frames = [frame for frame in (kept, alerts) if len(frame)]
+        if frames:
+            self.recent = pd.concat(frames, ignore_index=True).sort_values(
+                ["Score", "Date"], ascending=False, ignore_index=True)
+        else:
+            self.recent = pd.DataFrame(columns=COLUMNS)
+        return alerts
+
+    def matches(self, df: pd.DataFrame) -> bool:
+        # Whether `df` extends the prices this scanner has seen, so update()
+        # can carry on from it rather than a new scanner being built
+        close = close_prices(df)
+        if self.last is None or close.columns.tolist() != self.tickers or self.last not in close.index:
+            return False
+        seen = close.loc[self.last].to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.array_equal(seen, self.buffer[-1], equal_nan=True)
@@ -0,0 +1,168 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+from dataclasses import dataclass
+
+import pandas as pd
+
+from panel import memory_bytes
+
+# Memory budget for datasets nobody is using any more; override with
+# TS_SHARED_STORE_BUDGET_MB in the environment
+MEMORY_BUDGET_BYTES = int(os.environ.get("TS_SHARED_STORE_BUDGET_MB", 2048)) * 1024 * 1024
+
+
+@dataclass
+class _Entry:
+    df: pd.DataFrame
+    nbytes: int
+    refs: int = 0
+
+
+def normalize_tickers(tickers) -> list:
+    # The one place ticker input is cleaned up: stripped, upper-cased (Yahoo
+    # symbols are), blanks and repeats dropped. The same list is used for the
+    # store key and the download, so a key always describes its data.
+    normalized = []
+    for ticker in tickers:
+        ticker = ticker.strip().upper()
+        if ticker and ticker not in normalized:
+            normalized.append(ticker)
+    return normalized
+
+
+class DatasetHandle:
+    # A session's reference to a shared dataset. The reference is dropped by
+    # release() or, at the latest, when the handle is garbage collected along
+    # with the session state that holds it. `df` is the session's own shallow
+    # copy: with copy-on-write (see app.py) it shares the buffers, and a
+    # session writing to it gets a private copy of just the touched columns,
+    # so the shared panel stays read-only.
+    def __init__(self, store, key, df: pd.DataFrame, counted: bool = True):
+        self.key = key
+        self.df = df.copy(deep=False)
+        self._finalizer = weakref.finalize(self, store._release, key) if counted else None
+
+    def release(self):
+        if self._finalizer is not None:
+            self._finalizer()
+
+
+class SharedStore:
+    # Process-wide, reference-counted dataset store shared (read-only) by all
+    # Streamlit sessions. Identical requests share one DataFrame, concurrent
+    # requests for a key that is still loading wait for that single load, and
+    # unreferenced datasets are evicted least-recently-used first once the
+    # store grows past its memory budget.
+    def __init__(self, budget_bytes: int = MEMORY_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(tickers: list, start, end, **options) -> tuple:
+        # Tickers as passed to the loader (see normalize_tickers), in any order
+        return (
+            tuple(sorted(tickers)),
+            str(pd.Timestamp(start).date()),
+            str(pd.Timestamp(end).date()),
+            tuple(sorted(options.items())),
+        )
+
+    def acquire(self, key, loader) -> DatasetHandle:
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refs += 1
+                    self._entries.move_to_end(key)
+                    return DatasetHandle(self, key, entry.df)
+                future = self._inflight.get(key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._inflight[key] = future
+
+            if owner:
+                try:
+                    df = loader()
+                except Exception as e:
+                    with self._lock:
+                        del self._inflight[key]
+                    future.set_exception(e)
+                    raise
+                except BaseException:
+                    # Streamlit's rerun/stop or a KeyboardInterrupt belongs to
+                    # the owner's session alone: the waiters load it themselves
+                    with self._lock:
+                        del self._inflight[key]
+                    future.cancel()
+                    raise
+                with self._lock:
+                    del self._inflight[key]
+                future.set_result(df)
+                break
+            try:
+                df = future.result()
+                break
+            except CancelledError:
+                continue
+
+        # Failed / empty downloads are handed back but never shared
+        if df is None or df.empty:
+            return DatasetHandle(self, key, df if df is not None else pd.DataFrame(), counted=False)
+        self._add_ref(key, df)
+        return DatasetHandle(self, key, df)
+
+    def _add_ref(self, key, df: pd.DataFrame):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # First reference (or re-inserted after an eviction race)
+                entry = self._entries[key] = _Entry(df, memory_bytes(df))
+            entry.refs += 1
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.refs > 0:
+                entry.refs -= 1
+            self._evict()
+
+    def _evict(self):
+        # Caller holds the lock. Datasets still referenced are never evicted.
+        total = sum(entry.nbytes for entry in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.budget_bytes:
+                break
+            entry = self._entries[key]
+            if entry.refs == 0:
+                total -= entry.nbytes
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "datasets": len(self._entries),
+                "bytes": sum(entry.nbytes for entry in self._entries.values()),
+                "references": sum(entry.refs for entry in self._entries.values()),
+                "loading": len(self._inflight),
+                "budget_bytes": self.budget_bytes,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def shared_store() -> SharedStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SharedStore()
+        return _store
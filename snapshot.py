@@ -0,0 +1,311 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_DIR = "snapshots"
+
+
+class SnapshotStore:
+    # Binary snapshots of wide panels. Each snapshot is a directory with the
+    # date index and one .npy block per dtype, laid out column-major so every
+    # column is a contiguous run on disk. Nullable columns (e.g. the Int64
+    # Volume of a normalized panel) keep their values in a block of their own
+    # plus a missing-value mask, and a categorical column level is noted, so
+    # a panel comes back with the dtypes it was saved with. Opening memory-maps
+    # the blocks and wraps each column without copying, so nothing is read
+    # until a column is touched. Views (e.g. the filtered columns) are stored as a column list
+    # on top of a snapshot instead of as another copy of the data.
+    def __init__(self, root: str = SNAPSHOT_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, "views"), exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _view_path(self, name: str) -> str:
+        return os.path.join(self.root, "views", f"{name}.json")
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(os.path.join(self._path(name), "meta.json"))
+
+    def save(self, df: pd.DataFrame, name: str = "data"):
+        if not (isinstance(df.index, pd.DatetimeIndex) or pd.api.types.is_numeric_dtype(df.index)):
+            raise TypeError("Snapshots need a datetime or numeric index")
+        tmp_dir = self._path(name) + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        np.save(os.path.join(tmp_dir, "index.npy"), np.asarray(df.index))
+
+        # Group columns by dtype; each group is written column by column into
+        # a (n_columns, n_rows) block without materialising the whole group.
+        # Nullable columns are grouped apart (their values, then their masks).
+        groups = {}
+        for position, dtype in enumerate(df.dtypes):
+            if _is_masked(dtype):
+                groups.setdefault(("values", dtype.numpy_dtype.str), []).append(position)
+                groups.setdefault(("mask", "|b1"), []).append(position)
+                continue
+            # Other extension / non-numeric dtypes are stored as float64
+            if not isinstance(dtype, np.dtype) or dtype.kind not in "biuf":
+                dtype = np.dtype("float64")
+            groups.setdefault(("plain", dtype.str), []).append(position)
+        columns = [None] * df.shape[1]
+        for block_id, ((kind, dtype), positions) in enumerate(groups.items()):
+            dtype = np.dtype(dtype)
+            block = np.lib.format.open_memmap(
+                os.path.join(tmp_dir, f"block{block_id}.npy"), mode="w+",
+                dtype=dtype, shape=(len(positions), len(df)),
+            )
+            for row, position in enumerate(positions):
+                column = df.iloc[:, position]
+                if kind == "mask":
+                    block[row] = column.isna().to_numpy()
+                    columns[position]["mask"] = [block_id, row]
+                    continue
+                if kind == "values":
+                    block[row] = column.to_numpy(dtype=dtype, na_value=0)
+                elif dtype.kind == "f":
+                    block[row] = column.to_numpy(dtype=dtype, na_value=np.nan)
+                else:
+                    block[row] = column.to_numpy(dtype=dtype)
+                columns[position] = {"label": _label(df.columns[position]), "block": block_id, "row": row}
+                if kind == "values":
+                    columns[position]["dtype"] = str(df.dtypes.iloc[position])
+            block.flush()
+            del block
+
+        _write_meta(tmp_dir, columns, df.columns, df.index.name, len(groups))
+        self._swap_in(tmp_dir, name)
+
+    def _swap_in(self, tmp_dir: str, name: str):
+        # Swap the finished snapshot in; readers holding the old memmaps keep
+        # their (unlinked) files until they let go of them
+        final_dir = self._path(name)
+        old_dir = final_dir + ".old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(final_dir):
+            os.replace(final_dir, old_dir)
+        os.replace(tmp_dir, final_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def writer(self, name: str, index: pd.Index, columns: pd.Index, dtype=np.float64) -> "SnapshotWriter":
+        return SnapshotWriter(self, name, index, columns, dtype)
+
+    def reader(self, name: str = "data") -> "SnapshotReader":
+        return SnapshotReader(self._path(name))
+
+    def open(self, name: str = "data", columns: list = None) -> pd.DataFrame:
+        path = self._path(name)
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        index = pd.Index(np.load(os.path.join(path, "index.npy")), name=meta["index_name"])
+        blocks = [np.load(os.path.join(path, f"block{i}.npy"), mmap_mode="r") for i in range(meta["blocks"])]
+
+        # One frame per memory-mapped block, columns labelled by their original
+        # position; transposing and selecting columns are views, not copies.
+        # Nullable columns wrap their value and mask rows, also without a copy.
+        entries = meta["columns"]
+        frames = []
+        masked = {pos: entry for pos, entry in enumerate(entries) if "mask" in entry}
+        if masked:
+            frames.append(pd.DataFrame({
+                pos: pd.api.types.pandas_dtype(entry["dtype"]).construct_array_type()(
+                    blocks[entry["block"]][entry["row"]], blocks[entry["mask"][0]][entry["mask"][1]], copy=False)
+                for pos, entry in masked.items()
+            }, index=index, copy=False))
+        value_blocks = {entry["block"] for entry in masked.values()}
+        mask_blocks = {entry["mask"][0] for entry in masked.values()}
+        for block_id, block in enumerate(blocks):
+            if block_id in value_blocks or block_id in mask_blocks:
+                continue
+            positions = [pos for pos, entry in enumerate(entries) if entry["block"] == block_id]
+            frame = pd.DataFrame(block.T, index=index, copy=False)
+            frame.columns = positions
+            frames.append(frame)
+        df = pd.concat(frames, axis=1) if len(frames) > 1 else frames[0] if frames else pd.DataFrame(index=index)
+
+        positions = list(range(len(entries)))
+        if columns is not None:
+            wanted = {_key(col) for col in columns}
+            positions = [pos for pos in positions if _key(entries[pos]["label"]) in wanted]
+        df = df[positions]
+
+        labels = [_unlabel(entries[pos]["label"], meta["multiindex"]) for pos in positions]
+        if meta["multiindex"]:
+            df.columns = pd.MultiIndex.from_tuples(labels, names=meta["column_names"]) if labels else \
+                pd.MultiIndex.from_arrays([[]] * len(meta["column_names"]), names=meta["column_names"])
+            for level in meta.get("categorical_levels", []):
+                values = df.columns.levels[level]
+                df.columns = df.columns.set_levels(pd.CategoricalIndex(values, name=values.name), level=level)
+        else:
+            df.columns = pd.Index(labels, name=meta["column_names"][0])
+        return df
+
+    def view_exists(self, name: str) -> bool:
+        return os.path.exists(self._view_path(name))
+
+    def save_view(self, name: str, columns: list, base: str = "data"):
+        tmp_path = self._view_path(name) + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"base": base, "columns": [_label(col) for col in columns]}, f)
+        os.replace(tmp_path, self._view_path(name))
+
+    def open_view(self, name: str) -> pd.DataFrame:
+        with open(self._view_path(name)) as f:
+            view = json.load(f)
+        return self.open(view["base"], columns=view["columns"])
+
+
+class SnapshotWriter:
+    # Builds a single-dtype snapshot piece by piece, for panels that never
+    # fit in memory as one frame: the index and column labels are fixed up
+    # front, then any (rows x columns) rectangle can be written into the
+    # block. Writes go through the file rather than a memory map, so pages
+    # already written do not stay resident in this process. The snapshot
+    # only replaces an existing one of the same name on close().
+    def __init__(self, store: SnapshotStore, name: str, index: pd.Index, columns: pd.Index, dtype=np.float64):
+        self.store = store
+        self.name = name
+        self.index = index
+        self.columns = columns
+        self.tmp_dir = store._path(name) + ".tmp"
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir)
+        np.save(os.path.join(self.tmp_dir, "index.npy"), np.asarray(index))
+        path = os.path.join(self.tmp_dir, "block0.npy")
+        # Lays out the header and a (sparse) full-size file
+        block = np.lib.format.open_memmap(path, mode="w+", dtype=np.dtype(dtype), shape=(len(columns), len(index)))
+        del block
+        self.layout = _npy_layout(path)
+        self.file = open(path, "r+b")
+
+    def write(self, values: np.ndarray, start: int = 0, columns: slice = slice(None)):
+        # values is (rows x columns), for rows start.. and the given column range
+        offset, dtype, (n_columns, n_rows) = self.layout
+        values = np.asarray(values, dtype=dtype)
+        for i, column in enumerate(range(*columns.indices(n_columns))):
+            self.file.seek(offset + (column * n_rows + start) * dtype.itemsize)
+            self.file.write(np.ascontiguousarray(values[:, i]).tobytes())
+
+    def close(self):
+        self.file.close()
+        entries = [{"label": _label(col), "block": 0, "row": row} for row, col in enumerate(self.columns)]
+        _write_meta(self.tmp_dir, entries, self.columns, self.index.name, 1)
+        self.store._swap_in(self.tmp_dir, self.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        return False
+
+
+class SnapshotReader:
+    # Column and row ranges of a snapshot as plain arrays, without building
+    # a DataFrame over the whole panel: each read copies just the requested
+    # rows of each column straight from the block files (every column is a
+    # contiguous run on disk), so the working set is the block being read.
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.path = path
+        self.index = pd.Index(np.load(os.path.join(path, "index.npy")), name=meta["index_name"])
+        self._layouts = [_npy_layout(os.path.join(path, f"block{i}.npy")) for i in range(meta["blocks"])]
+        self._entries = meta["columns"]
+        labels = [_unlabel(entry["label"], meta["multiindex"]) for entry in self._entries]
+        if meta["multiindex"]:
+            self.columns = pd.MultiIndex.from_tuples(labels, names=meta["column_names"])
+        else:
+            self.columns = pd.Index(labels, name=meta["column_names"][0])
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def field(self, name: str = "Close") -> list:
+        # Positions of one price field's columns (every numeric column of a flat panel)
+        if isinstance(self.columns, pd.MultiIndex):
+            return [pos for pos, col in enumerate(self.columns) if col[0] == name]
+        return [pos for pos, entry in enumerate(self._entries) if self._layouts[entry["block"]][1].kind in "iuf"]
+
+    def _read_mask(self, where: list, start: int, count: int) -> np.ndarray:
+        # Missing-value mask of a nullable column, rows start.. start + count
+        block_id, row = where
+        offset, dtype, (_, n_rows) = self._layouts[block_id]
+        with open(os.path.join(self.path, f"block{block_id}.npy"), "rb") as f:
+            f.seek(offset + (row * n_rows + start) * dtype.itemsize)
+            return np.fromfile(f, dtype=dtype, count=count)
+
+    def read(self, positions: list, start: int = 0, stop: int = None, dtype=np.float64) -> np.ndarray:
+        # (rows x columns) copy of rows start:stop of the given columns
+        stop = len(self) if stop is None else stop
+        out = np.empty((max(0, stop - start), len(positions)), dtype=dtype)
+        files = {}
+        try:
+            for i, pos in enumerate(positions):
+                entry = self._entries[pos]
+                offset, block_dtype, (_, n_rows) = self._layouts[entry["block"]]
+                if entry["block"] not in files:
+                    files[entry["block"]] = open(os.path.join(self.path, f"block{entry['block']}.npy"), "rb")
+                f = files[entry["block"]]
+                f.seek(offset + (entry["row"] * n_rows + start) * block_dtype.itemsize)
+                out[:, i] = np.fromfile(f, dtype=block_dtype, count=len(out))
+                if "mask" in entry:
+                    out[self._read_mask(entry["mask"], start, len(out)), i] = np.nan
+        finally:
+            for f in files.values():
+                f.close()
+        return out
+
+
+def _npy_layout(path: str) -> tuple:
+    # (data offset, dtype, shape) of a C-ordered .npy file
+    with open(path, "rb") as f:
+        version = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else \
+            np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        if fortran_order:
+            raise ValueError(f"{path} is not C-ordered")
+        return f.tell(), dtype, shape
+
+
+def _is_masked(dtype) -> bool:
+    # Nullable integer, float and boolean dtypes: numpy values plus a mask
+    return isinstance(dtype, pd.api.extensions.ExtensionDtype) and hasattr(dtype, "numpy_dtype") \
+        and dtype.kind in "biuf"
+
+
+def _write_meta(path: str, entries: list, columns: pd.Index, index_name, blocks: int):
+    multiindex = isinstance(columns, pd.MultiIndex)
+    meta = {
+        "columns": entries,
+        "column_names": list(columns.names),
+        "multiindex": multiindex,
+        "categorical_levels": [i for i, level in enumerate(columns.levels)
+                               if isinstance(level, pd.CategoricalIndex)] if multiindex else [],
+        "index_name": index_name,
+        "blocks": blocks,
+    }
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def _label(column):
+    return list(column) if isinstance(column, tuple) else column
+
+
+def _key(label):
+    return tuple(label) if isinstance(label, (list, tuple)) else label
+
+
+def _unlabel(label, multiindex: bool):
+    return tuple(label) if multiindex else label
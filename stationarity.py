@@ -1,10 +1,15 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from plotly.subplots import make_subplots
-from statsmodels.tsa.seasonal import seasonal_decompose
-
-def check_stationarity(df: pd.DataFrame, tickers: list):
+from bars import seasonal_period
+from decomposition import decompose_many, stationarity_table, MODEL
+from diagnostics import dataframe, plotly_chart
+from figures import add_lines
+from indicators import close_prices
+from instrumentation import instrumented
+
+@instrumented
+def check_stationarity(df: pd.DataFrame, tickers: list, date_range=None):
     st.title("📊 Stationarity Analysis")
     st.subheader("Seasonal Decomposition of Stock Prices")
 
@@ -14,40 +19,33 @@ def check_stationarity(df: pd.DataFrame, tickers: list):
 
     # Display the filtered DataFrame
     st.write("Filtered Data:")
-    st.dataframe(df)
+    dataframe(df)
 
-    # Handle multi-level columns from yfinance
-    if isinstance(df.columns, pd.MultiIndex):
-        data_close = df['Close'].copy()
-    else:
-        data_close = df.select_dtypes(include=['float64', 'int64']).copy()
+    data_close = close_prices(df)
 
     if data_close.empty:
         st.info("No valid columns found for stationarity analysis.")
         return
 
-    # Perform seasonal decomposition and plot for each ticker
-    for ticker in tickers[:6]:  # Limit to 6 tickers to avoid overwhelming the display
-        ticker = ticker.strip()
-        if ticker not in data_close.columns:
-            st.warning(f"Ticker {ticker} not found in data.")
-            continue
+    for ticker in tickers:
+        if ticker.strip() not in data_close.columns:
+            st.warning(f"Ticker {ticker.strip()} not found in data.")
 
-        # Perform seasonal decomposition
-        try:
-            result = seasonal_decompose(data_close[ticker], model='additive', period=365)
-        except Exception as e:
-            st.error(f"Error performing seasonal decomposition for {ticker}: {str(e)}")
-            continue
+    # Decompose all tickers in one batch (cached, in parallel) with ADF/KPSS tests;
+    # the season is one trading year of daily bars or one session of intraday bars
+    period = seasonal_period(data_close.index)
+    st.caption(f"Seasonal period: {period} bars")
+    results = decompose_many(data_close, tickers, model=MODEL, period=period)
+    if not results:
+        return
+    st.write("Stationarity Tests (ADF / KPSS):")
+    dataframe(stationarity_table(results))
 
-        # Create a temporary DataFrame for Plotly Express
-        plot_df = pd.DataFrame({
-            'Date': data_close.index,
-            'Original': data_close[ticker],
-            'Trend': result.trend,
-            'Seasonal': result.seasonal,
-            'Residual': result.resid
-        }).reset_index(drop=True)
+    # Plot the decomposition for each ticker
+    for ticker, result in results.items():
+        if result.error:
+            st.error(f"Error performing seasonal decomposition for {ticker}: {result.error}")
+            continue
 
         # Create a subplot with 4 rows (Original, Trend, Seasonal, Residual)
         fig = make_subplots(
@@ -62,53 +60,16 @@ def check_stationarity(df: pd.DataFrame, tickers: list):
             vertical_spacing=0.15  # Increased to prevent overlapping headings
         )
 
-        # Plot Original Series
-        original_fig = px.line(
-            plot_df,
-            x='Date',
-            y='Original',
-            labels={'value': 'Price', 'Date': 'Date'},
-            color_discrete_sequence=['blue']
-        )
-        for trace in original_fig.data:
-            trace.name = 'Original'
-            fig.add_trace(trace, row=1, col=1)
-
-        # Plot Trend Component
-        trend_fig = px.line(
-            plot_df,
-            x='Date',
-            y='Trend',
-            labels={'value': 'Price', 'Date': 'Date'},
-            color_discrete_sequence=['green']
-        )
-        for trace in trend_fig.data:
-            trace.name = 'Trend'
-            fig.add_trace(trace, row=2, col=1)
-
-        # Plot Seasonal Component
-        seasonal_fig = px.line(
-            plot_df,
-            x='Date',
-            y='Seasonal',
-            labels={'value': 'Price', 'Date': 'Date'},
-            color_discrete_sequence=['orange']
-        )
-        for trace in seasonal_fig.data:
-            trace.name = 'Seasonality'
-            fig.add_trace(trace, row=3, col=1)
-
-        # Plot Residual Component
-        residual_fig = px.line(
-            plot_df,
-            x='Date',
-            y='Residual',
-            labels={'value': 'Price', 'Date': 'Date'},
-            color_discrete_sequence=['red']
-        )
-        for trace in residual_fig.data:
-            trace.name = 'Residuals'
-            fig.add_trace(trace, row=4, col=1)
+        # One component per row, built straight from the decomposition arrays
+        components = [
+            (result.observed, 'Original', 'blue'),
+            (result.trend, 'Trend', 'green'),
+            (result.seasonal, 'Seasonality', 'orange'),
+            (result.resid, 'Residuals', 'red'),
+        ]
+        for row, (component, name, color) in enumerate(components, start=1):
+            add_lines(fig, result.observed.index, [(component.to_numpy(), name, color)],
+                      row=row, col=1, date_range=date_range)
 
         # Update axes
         fig.update_xaxes(title_text="Date", row=1, col=1)
@@ -130,4 +91,4 @@ def check_stationarity(df: pd.DataFrame, tickers: list):
         )
 
         # Display the plot
-        st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+        plotly_chart(fig, use_container_width=True)
\ No newline at end of file
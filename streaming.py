@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+from indicators import WINDOW
+
+
+class RollingWindow:
+    # Rolling mean / sample variance for many symbols at once, updated in O(1)
+    # per new value. Each symbol keeps a ring buffer of its last `window`
+    # values plus a running mean and sum of squared deviations (Welford).
+    # NaN values are treated as "no bar" and leave that symbol untouched.
+    def __init__(self, n_symbols: int, window: int = WINDOW):
+        self.window = window
+        self.buffer = np.full((n_symbols, window), np.nan)
+        self.pos = np.zeros(n_symbols, dtype=np.int64)
+        self.count = np.zeros(n_symbols, dtype=np.int64)
+        self.mean_ = np.zeros(n_symbols)
+        self.m2 = np.zeros(n_symbols)
+
+    def push(self, values):
+        values = np.asarray(values, dtype=float)
+        idx = np.flatnonzero(~np.isnan(values))
+        if idx.size == 0:
+            return
+        x = values[idx]
+        slot = self.pos[idx]
+        full = self.count[idx] >= self.window
+
+        # Still filling up: plain Welford insert
+        grow = idx[~full]
+        if grow.size:
+            xg = x[~full]
+            n = self.count[grow] + 1
+            delta = xg - self.mean_[grow]
+            self.mean_[grow] += delta / n
+            self.m2[grow] += delta * (xg - self.mean_[grow])
+            self.count[grow] = n
+
+        # Window is full: replace the oldest value in one step
+        slide = idx[full]
+        if slide.size:
+            xs = x[full]
+            old = self.buffer[slide, slot[full]]
+            old_mean = self.mean_[slide]
+            new_mean = old_mean + (xs - old) / self.window
+            self.m2[slide] += (xs - old) * (xs - new_mean + old - old_mean)
+            self.mean_[slide] = new_mean
+
+        self.buffer[idx, slot] = x
+        self.pos[idx] = (slot + 1) % self.window
+
+        # Once per full turn of the ring, recompute the sums exactly from the
+        # buffer so rounding error cannot build up (amortized O(1) per value)
+        wrapped = idx[(self.pos[idx] == 0) & (self.count[idx] >= self.window)]
+        if wrapped.size:
+            block = self.buffer[wrapped]
+            self.mean_[wrapped] = block.mean(axis=1)
+            self.m2[wrapped] = ((block - self.mean_[wrapped, None]) ** 2).sum(axis=1)
+        np.maximum(self.m2, 0.0, out=self.m2)
+
+    @property
+    def ready(self) -> np.ndarray:
+        return self.count >= self.window
+
+    def mean(self) -> np.ndarray:
+        return np.where(self.ready, self.mean_, np.nan)
+
+    def std(self) -> np.ndarray:
+        # Sample standard deviation (ddof=1), like pandas rolling().std()
+        if self.window < 2:
+            return np.full(self.count.shape, np.nan)
+        return np.where(self.ready, np.sqrt(self.m2 / (self.window - 1)), np.nan)
+
+
+class StreamingBollinger:
+    # Incremental Bollinger bands, daily return and return volatility for a
+    # fixed list of tickers. Feed one bar (or a small batch of bars) at a
+    # time; history is never re-read. After the first `window` bars per
+    # ticker the results match pandas rolling(window) on the same prices.
+    def __init__(self, tickers: list, window: int = WINDOW, k: float = 2):
+        self.tickers = list(tickers)
+        self.window = window
+        self.k = k
+        self.prices = RollingWindow(len(self.tickers), window)
+        self.returns = RollingWindow(len(self.tickers), window)
+        self.last_price = np.full(len(self.tickers), np.nan)
+        self.last_return = np.full(len(self.tickers), np.nan)
+
+    @classmethod
+    def from_history(cls, close: pd.DataFrame, window: int = WINDOW, k: float = 2) -> "StreamingBollinger":
+        # Warm up from the tail of a wide Close frame; window + 1 prices give
+        # a full window of returns as well
+        stream = cls(close.columns.tolist(), window=window, k=k)
+        stream.update_many(close.tail(window + 1))
+        return stream
+
+    def _align(self, prices) -> np.ndarray:
+        if isinstance(prices, (pd.Series, dict)):
+            prices = pd.Series(prices, dtype=float).reindex(self.tickers)
+        values = np.asarray(prices, dtype=float)
+        if values.shape != (len(self.tickers),):
+            raise ValueError(f"Expected {len(self.tickers)} prices, got shape {values.shape}")
+        return values
+
+    def update(self, prices) -> pd.DataFrame:
+        # prices: Series/dict keyed by ticker, or an array in ticker order
+        values = self._align(prices)
+        has_price = ~np.isnan(values)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            daily_return = values / self.last_price - 1
+        self.prices.push(values)
+        self.returns.push(daily_return)
+        self.last_return = np.where(has_price, daily_return, self.last_return)
+        self.last_price = np.where(has_price, values, self.last_price)
+        return self.snapshot()
+
+    def update_many(self, bars: pd.DataFrame) -> pd.DataFrame:
+        # A small batch of new rows (Date x ticker); returns the state after the last one
+        bars = bars.reindex(columns=self.tickers)
+        for row in bars.to_numpy(dtype=float):
+            self.update(row)
+        return self.snapshot()
+
+    def snapshot(self) -> pd.DataFrame:
+        mean = self.prices.mean()
+        std = self.prices.std()
+        return pd.DataFrame({
+            "price": self.last_price,
+            "rolling_mean": mean,
+            "rolling_std": std,
+            "upper_band": mean + std * self.k,
+            "lower_band": mean - std * self.k,
+            "daily_return": self.last_return,
+            "volatility": self.returns.std(),
+        }, index=pd.Index(self.tickers, name="Ticker"))
@@ -0,0 +1,57 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+import yfinance
+from yfinance.exceptions import YFPricesMissingError
+
+from concurrent_fetch import ConcurrentFetcher
+from price_cache import FetchError, PriceCache, YFinanceFetcher
+
+# A short gap, so an all-empty answer would be taken for a market closure
+START, END = date(2024, 1, 1), date(2024, 1, 6)
+
+
+class OutageTicker:
+    # Like yfinance during an outage: the error is only logged and an empty
+    # frame returned, unless the caller asks for errors to be raised
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def history(self, raise_errors=False, **kwargs):
+        if raise_errors:
+            raise ConnectionError("Max retries exceeded")
+        return pd.DataFrame()
+
+
+class ClosedTicker(OutageTicker):
+    def history(self, raise_errors=False, **kwargs):
+        raise YFPricesMissingError(self.ticker, f"(1d {START} -> {END})")
+
+
+def test_outage_raises(monkeypatch):
+    monkeypatch.setattr(yfinance, "Ticker", OutageTicker)
+    with pytest.raises(FetchError) as info:
+        YFinanceFetcher().fetch(["AAPL", "MSFT"], START, END)
+    assert info.value.failed == ["AAPL", "MSFT"]
+    assert "ConnectionError" in info.value.errors["AAPL"]
+
+
+@pytest.mark.parametrize("concurrent", [False, True])
+def test_outage_gap_not_covered(monkeypatch, tmp_path, concurrent):
+    monkeypatch.setattr(yfinance, "Ticker", OutageTicker)
+    fetcher = YFinanceFetcher()
+    if concurrent:
+        fetcher = ConcurrentFetcher(fetcher, retries=2, sleep=lambda seconds: None)
+    cache = PriceCache(str(tmp_path), fetcher=fetcher)
+    assert cache.get(["AAPL"], START, END).empty
+    assert cache.missing_ranges("AAPL", START, END) == [(START, END)]
+    # Asked for again on the next request, not remembered as fetched
+    assert PriceCache(str(tmp_path), fetcher=fetcher).missing_ranges("AAPL", START, END) == [(START, END)]
+
+
+def test_closed_gap_covered(monkeypatch, tmp_path):
+    monkeypatch.setattr(yfinance, "Ticker", ClosedTicker)
+    cache = PriceCache(str(tmp_path), fetcher=YFinanceFetcher())
+    assert cache.get(["AAPL"], START, END).empty
+    assert cache.missing_ranges("AAPL", START, END) == []
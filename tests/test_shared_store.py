@@ -0,0 +1,63 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from shared_store import SharedStore
+
+
+class Rerun(BaseException):
+    # Stands in for Streamlit's RerunException
+    pass
+
+
+def _race(store, owner_loader, waiter_loader):
+    # The owner starts loading; a second session asks for the same key meanwhile
+    started = threading.Event()
+    results = {}
+
+    def owner():
+        try:
+            results["owner"] = store.acquire("key", lambda: (started.set(), owner_loader())[1])
+        except BaseException as e:
+            results["owner"] = e
+
+    def waiter():
+        started.wait()
+        try:
+            results["waiter"] = store.acquire("key", waiter_loader)
+        except BaseException as e:
+            results["waiter"] = e
+
+    threads = [threading.Thread(target=owner), threading.Thread(target=waiter)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _slow(result, release: threading.Event):
+    def load():
+        release.wait(5)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+    return load
+
+
+@pytest.mark.parametrize("error, waiter_gets", [(Rerun(), "data"), (ValueError("boom"), ValueError)])
+def test_owner_failure(error, waiter_gets):
+    store = SharedStore()
+    release = threading.Event()
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    results = _race(store, _slow(error, release), lambda: pd.DataFrame({"Close": [1.0]}))
+    timer.join()
+    assert results["owner"] is error
+    if waiter_gets == "data":
+        # The owner's rerun stays in its own session; the waiter loads the data itself
+        assert list(results["waiter"].df["Close"]) == [1.0]
+    else:
+        assert isinstance(results["waiter"], waiter_gets)
+    assert store.stats()["loading"] == 0
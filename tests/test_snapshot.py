@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from panel import normalize_panel
+from snapshot import SnapshotStore
+
+
+def _panel():
+    index = pd.bdate_range("2024-01-01", periods=50, name="Date")
+    columns = pd.MultiIndex.from_product([["Close", "Volume"], ["AAPL", "MSFT"]], names=["Price", "Ticker"])
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((50, 4)) * 100, index=index, columns=columns)
+    df[("Volume", "AAPL")] = df[("Volume", "AAPL")].round().where(lambda s: s.index != index[3])
+    return normalize_panel(df, float32=True)
+
+
+def _mapped(series: pd.Series) -> bool:
+    # Whether the column's values still live in the snapshot's memory map
+    values = series.array._data if hasattr(series.array, "_data") else series.to_numpy()
+    while values is not None and not isinstance(values, np.memmap):
+        values = values.base
+    return values is not None
+
+
+def test_normalized_round_trip(tmp_path):
+    df = _panel()
+    assert str(df[("Volume", "AAPL")].dtype) == "Int64"
+    store = SnapshotStore(str(tmp_path))
+    store.save(df, "data")
+    loaded = store.open("data")
+    pd.testing.assert_frame_equal(loaded, df, check_freq=False)
+    assert isinstance(loaded.columns.levels[-1], pd.CategoricalIndex)
+
+    # Already normalized: nothing is converted, so nothing is copied
+    renormalized = normalize_panel(loaded, float32=True)
+    assert all(_mapped(renormalized[column]) for column in renormalized.columns)
+    assert not _mapped(df[("Close", "AAPL")])
+
+
+def test_reader_masks_gaps(tmp_path):
+    df = _panel()
+    store = SnapshotStore(str(tmp_path))
+    store.save(df, "data")
+    reader = store.reader("data")
+    volume = reader.read(reader.field("Volume"))
+    np.testing.assert_array_equal(volume, df["Volume"].to_numpy(dtype=np.float64, na_value=np.nan))
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from window_tensor import compute_window_tensor
+
+WINDOWS = (5, 20, 60)
+
+
+@pytest.fixture
+def gappy_close():
+    rng = np.random.default_rng(0)
+    close = pd.DataFrame(100 * np.cumprod(1 + rng.normal(0, 0.01, (400, 4)), axis=0),
+                         index=pd.bdate_range("2020-01-01", periods=400), columns=["A", "B", "C", "D"])
+    close[rng.random(close.shape) < 0.05] = np.nan
+    close.iloc[:30, 1] = np.nan  # a ticker that starts late
+    close.iloc[:, 2] = close.iloc[:, 2].fillna(close.iloc[0, 2])  # and one with no gaps
+    return close
+
+
+def test_ema_matches_pandas(gappy_close):
+    tensor = compute_window_tensor(gappy_close, WINDOWS)
+    for w in WINDOWS:
+        expected = gappy_close.ewm(span=w, adjust=False, ignore_na=True, min_periods=w).mean()
+        pd.testing.assert_frame_equal(tensor.frame("ema", w), expected, check_freq=False, rtol=1e-12)
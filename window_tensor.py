@@ -0,0 +1,201 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from indicators import Indicators, close_prices, fingerprint
+from instrumentation import instrumented
+
+WINDOWS = tuple(range(5, 205, 5))
+K = 2
+MAX_CACHE_ENTRIES = 4
+# Largest tensor built for every window; longer (e.g. minute-bar) histories
+# only get the window that was asked for
+MAX_TENSOR_BYTES = 512 * 2 ** 20
+
+METRICS = ("sma", "ema", "std", "percent_b", "volatility")
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class WindowTensor:
+    # Indicators for many windows at once. Each metric is a (window, ticker,
+    # time) array, so one window's (time x ticker) frame is a view of a
+    # contiguous slab and picking another window is an index, not a recompute.
+    windows: tuple
+    k: float
+    close: pd.DataFrame
+    daily_return: pd.DataFrame
+    sma: np.ndarray
+    ema: np.ndarray
+    std: np.ndarray
+    percent_b: np.ndarray
+    volatility: np.ndarray
+
+    def position(self, window: int) -> int:
+        try:
+            return self.windows.index(window)
+        except ValueError:
+            raise KeyError(f"window {window} is not in the tensor ({self.windows[0]}..{self.windows[-1]})") from None
+
+    def frame(self, metric: str, window: int) -> pd.DataFrame:
+        if metric not in METRICS:
+            raise KeyError(f"unknown metric {metric!r}, expected one of {METRICS}")
+        values = getattr(self, metric)[self.position(window)]
+        return pd.DataFrame(values.T, index=self.close.index, columns=self.close.columns, copy=False)
+
+    def indicators(self, window: int) -> Indicators:
+        # Same shape as indicators.get_indicators, so the pages can use either
+        return Indicators(
+            close=self.close,
+            rolling_mean=self.frame("sma", window),
+            rolling_std=self.frame("std", window),
+            daily_return=self.daily_return,
+            volatility=self.frame("volatility", window),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, metric).nbytes for metric in METRICS)
+
+
+def _split_cumsum(x: np.ndarray) -> tuple:
+    # Running sum along time (with a leading zero) accumulated in extended
+    # precision and kept as a float64 hi/lo pair, so windowed differences of
+    # it stay exact to ~1e-16 while all per-window work runs in float64
+    total = np.cumsum(x, axis=1, dtype=np.longdouble)
+    hi = np.zeros((x.shape[0], x.shape[1] + 1))
+    lo = np.zeros_like(hi)
+    hi[:, 1:] = total
+    lo[:, 1:] = total - hi[:, 1:]
+    return hi, lo
+
+
+def rolling_mean_std(values: np.ndarray, windows: tuple) -> tuple:
+    # values is (ticker, time). Running sums over the whole series are taken
+    # once; each window is then a difference of two shifted slices of them.
+    # Series are centered first so the sum of squares does not swamp the
+    # variance; a window touching a NaN is NaN, like pandas rolling().
+    n, t = values.shape
+    valid = ~np.isnan(values)
+    offset = np.zeros(n)
+    has_data = valid.any(axis=1)
+    offset[has_data] = np.nanmean(values[has_data], axis=1)
+    x = np.where(valid, values - offset[:, None], 0.0)
+
+    hi1, lo1 = _split_cumsum(x)
+    hi2, lo2 = _split_cumsum(x * x)
+    gaps = None
+    if not valid.all():
+        gaps = np.zeros((n, t + 1), dtype=np.int64)
+        np.cumsum(~valid, axis=1, out=gaps[:, 1:])
+
+    mean = np.full((len(windows), n, t), np.nan)
+    std = np.full((len(windows), n, t), np.nan)
+    for i, w in enumerate(windows):
+        if w > t:
+            continue
+        total = (hi1[:, w:] - hi1[:, :-w]) + (lo1[:, w:] - lo1[:, :-w])
+        var = (hi2[:, w:] - hi2[:, :-w]) + (lo2[:, w:] - lo2[:, :-w])
+        var -= total * total / w
+        var /= w - 1
+        np.maximum(var, 0.0, out=var)
+        window_mean, window_std = mean[i, :, w - 1:], std[i, :, w - 1:]
+        np.divide(total, w, out=window_mean)
+        window_mean += offset[:, None]
+        np.sqrt(var, out=window_std)
+        if gaps is not None:
+            incomplete = (gaps[:, w:] - gaps[:, :-w]) > 0
+            window_mean[incomplete] = np.nan
+            window_std[incomplete] = np.nan
+    return mean, std
+
+
+def _ema(values: np.ndarray, windows: tuple) -> np.ndarray:
+    # Recursive EMA, the same as ewm(span=w, adjust=False, ignore_na=True,
+    # min_periods=w) per window. Each ticker's observed prices are packed to
+    # the front, so one IIR filter per window runs over every ticker at once
+    # in C, and each bar then reads the EMA as of its latest observed price:
+    # a gap repeats the last value and the first w - 1 observations are empty.
+    from scipy.signal import lfilter
+
+    valid = ~np.isnan(values)
+    seen = np.cumsum(valid, axis=1)
+    gaps = not valid.all()
+    packed = values
+    if gaps:
+        order = np.argsort(~valid, axis=1, kind="stable")
+        packed = np.take_along_axis(values, order, axis=1)
+        packed[np.isnan(packed)] = 0.0  # the unused tail; it never feeds an observed value
+        latest = np.maximum(seen - 1, 0)
+
+    ema = np.empty((len(windows),) + values.shape)
+    for i, w in enumerate(windows):
+        alpha = 2.0 / (w + 1)
+        # Starts from the first observed price: y[0] = alpha * x[0] + zi
+        level, _ = lfilter([alpha], [1.0, alpha - 1], packed, axis=1, zi=(1 - alpha) * packed[:, :1])
+        ema[i] = np.take_along_axis(level, latest, axis=1) if gaps else level
+        ema[i][seen < w] = np.nan
+    return ema
+
+
+def compute_window_tensor(close: pd.DataFrame, windows: tuple = WINDOWS, k: float = K) -> WindowTensor:
+    windows = tuple(sorted({int(w) for w in windows}))
+    if not windows or windows[0] < 2:
+        raise ValueError("windows must be integers >= 2")
+
+    values = close.to_numpy(dtype=np.float64, na_value=np.nan).T
+    daily_return = close.pct_change()
+    returns = daily_return.to_numpy(dtype=np.float64, na_value=np.nan).T
+
+    sma, std = rolling_mean_std(values, windows)
+    _, volatility = rolling_mean_std(returns, windows)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent_b = (values[None] - sma) / (2 * k * std) + 0.5
+    return WindowTensor(
+        windows=windows,
+        k=k,
+        close=close,
+        daily_return=daily_return,
+        sma=sma,
+        ema=_ema(values, windows),
+        std=std,
+        percent_b=percent_b,
+        volatility=volatility,
+    )
+
+
+@instrumented
+def get_window_tensor(df: pd.DataFrame, tickers: list = None, windows: tuple = WINDOWS, k: float = K,
+                      window: int = None) -> WindowTensor:
+    # Memoized on (fingerprint of the selected Close columns, windows, k). The
+    # tensor grows with windows x tickers x bars, so callers pass the tickers
+    # they actually show rather than the whole panel, and the window they need
+    # so that a tensor over MAX_TENSOR_BYTES can shrink to just that window.
+    close = close_prices(df)
+    if tickers is not None:
+        close = close[[t.strip() for t in tickers if t.strip() in close.columns]]
+    if window is not None and len(windows) * close.size * 8 * len(METRICS) > MAX_TENSOR_BYTES:
+        windows = (window,)
+    key = (fingerprint(close), tuple(windows), k)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    result = compute_window_tensor(close, windows, k)
+    with _lock:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return result
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()